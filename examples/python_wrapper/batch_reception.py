@@ -0,0 +1,37 @@
+import argparse
+import time
+
+from functions.ook_batch_func import *
+
+"""
+Batch version of reception.py for archived captures:
+every .wav recording of a directory is split into frames (located by their CP head)
+and the frames are decoded in parallel on a process pool.
+The reconstructed files of each frame go to <output>/<recording>/frame_<i>/,
+a summary row per frame is printed and written to <output>/summary.csv as soon as the frame is done.
+"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode a directory of OOK recordings")
+    parser.add_argument("directory", nargs="?", default="./reconstructed_data/recordings")
+    parser.add_argument("--output", default="./reconstructed_data/batch")
+    parser.add_argument("--reference", default="./info_to_send/bitstream.bits",
+                        help="bitstream that was sent, used for the symbol error rate ('' to skip)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print("-----------------")
+    print(" Batch reception")
+    print("-----------------\n")
+
+    start = time.perf_counter()
+    rows = []
+    for row in batch_decode(args.directory, args.output, args.reference or None, args.workers):
+        rows.append(row)
+        ser = f"{row['ser'] * 100:.2f} %" if row["ser"] is not None else "-"
+        print(f"{row['recording']} [frame {row['frame']}] bits: {row['bits']}  SER: {ser}  {row['error'] or ''}")
+
+    summary = ser_summary(rows)
+    print(f"\n{summary['frames']} frame(s), {summary['failed']} failed, {time.perf_counter() - start:.1f} s")
+    if summary["mean_ser"] is not None:
+        print(f"SER: {summary['mean_ser'] * 100:.3f} % (mean), {summary['max_ser'] * 100:.3f} % (worst frame)")
@@ -0,0 +1,77 @@
+import os
+import time
+
+from functions.types_to_bin_func import *
+
+"""
+Benchmark of the bitstream decoders on a 10 MB payload:
+
+- legacy: '0'/'1' string walked with int(bitstream[i:i+8], 2) slices,
+          payload bytes rebuilt with one int() per byte
+- packed: iter_sections() on the packed bit buffer (struct headers, payload views)
+"""
+
+PAYLOAD_SIZE = 10 * 1024 * 1024 # bytes
+
+
+def legacy_decode(bitstream: str) -> list:
+    """Reference copy of the original string-based parsing loop."""
+    i = 0
+    results = []
+    while i < len(bitstream):
+        type_id = int(bitstream[i:i+8], 2)
+        length = int(bitstream[i+8:i+40], 2)
+        payload = bitstream[i+40:i+40+length]
+        results.append((type_id, payload))
+        i += 40 + length
+
+    # Same work as bitstring_to_file(): payload bits -> bytes
+    out = []
+    for type_id, payload in results:
+        if type_id == 0:
+            out.append(int(payload, 2))
+        else:
+            out.append(bytes(int(payload[i:i+8], 2) for i in range(0, len(payload), 8)))
+    return out
+
+
+def packed_decode(bitstream: bit_buffer) -> list:
+    """Zero-copy parsing loop."""
+    out = []
+    for type_id, payload in iter_sections(bitstream):
+        if type_id == 0:
+            out.append(payload.to_int())
+        else:
+            out.append(payload.memview())
+    return out
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+"""
+Build the frame: a few small ints (which leave the payload unaligned, as in a real frame)
+followed by a 10 MB binary section
+"""
+data = os.urandom(PAYLOAD_SIZE)
+
+frame = bit_buffer.join([encode_chunk(0, int_to_binary(1)),
+                         encode_chunk(0, int_to_binary(49)),
+                         encode_chunk(5, bit_buffer.from_bytes(data))])
+frame_str = frame.to_bitstring()
+
+print(f"Frame of {len(frame)} bits")
+print(f"Memory: {len(frame_str) / 1e6:.1f} MB as str, {frame.data.nbytes / 1e6:.1f} MB packed\n")
+
+legacy, t_legacy = timed(legacy_decode, frame_str)
+packed, t_packed = timed(packed_decode, frame)
+
+assert legacy[:2] == packed[:2]
+assert legacy[2] == bytes(packed[2]) == data
+
+print(f"legacy decoder: {t_legacy:8.3f} s")
+print(f"packed decoder: {t_packed:8.3f} s")
+print(f"speed-up:       {t_legacy / t_packed:8.1f}x")
@@ -0,0 +1,58 @@
+import csv
+import os
+import tempfile
+
+from functions.csv_management_func import *
+
+"""
+Round trips of CSV files through the columnar codec: the decoded rows must give back the exact
+text of every cell, whatever the types chosen by the schema pass (forced by HOUSEKEEPING_SCHEMA
+or inferred), including values the binary types cannot hold (blank cells, UTC offsets, ...).
+"""
+
+HEADER = ["Timestamp", "Bus_Voltage_V", "ReactionWheel_Speed_rpm", "Mode", "Local_Time"]
+
+CASES = {
+    "clean": [["2025-11-02T12:00:00.000Z", "3.3", "1200", "IDLE", "2025-11-02T13:00:00.000"],
+              ["2025-11-02T12:00:01.000Z", "3.4", "1210", "SAFE", "2025-11-02T13:00:01.000"]],
+    "blank cell": [["2025-11-02T12:00:00.000Z", "3.3", "1200", "IDLE", "2025-11-02T13:00:00.000"],
+                   ["2025-11-02T12:00:01.000Z", "", "1210", "SAFE", ""]],
+    "int64 overflow": [["2025-11-02T12:00:00.000Z", "3.3", "9999999999999999999999", "IDLE", "2025-11-02T13:00:00.000"],
+                       ["2025-11-02T12:00:01.000Z", "3.4", "1210", "SAFE", "2025-11-02T13:00:01.000"]],
+    "UTC offset": [["2025-11-02T12:00:00+01:00", "3.3", "1200", "IDLE", "2025-11-02T12:00:00+01:00"],
+                   ["2025-11-02T12:00:01-05:30", "3.4", "1210", "SAFE", "2025-11-02T12:00:01-05:30"]],
+    "mixed suffix": [["2025-11-02T12:00:00.000Z", "3.3", "1200", "IDLE", "2025-11-02T13:00:00.000Z"],
+                     ["2025-11-02T12:00:01.000", "3.4", "1210", "SAFE", "2025-11-02T13:00:01.000"]],
+}
+
+
+def roundtrip(rows: list[list[str]], block_rows: int = 1) -> tuple[dict, list[list[str]]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "in.csv")
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerows([HEADER] + rows)
+        meta, nbits, pieces = csv_to_columnar(path, block_rows=block_rows)
+        payload = bit_buffer.join(list(pieces))
+        assert len(payload) == nbits, f"{len(payload)} bits encoded, {nbits} announced"
+        decoded = [row for block in iter_columnar_rows(payload, meta) for row in block]
+    return meta, decoded
+
+
+for name, rows in CASES.items():
+    meta, decoded = roundtrip(rows)
+    expected = [cell for row in rows for cell in row]
+    assert decoded == expected, f"{name}: {decoded} != {expected}"
+    types = ", ".join(f"{h}={c['type']}" for h, c in zip(meta["header"], meta["columns"]))
+    print(f"{name:15} OK ({types})")
+
+# Offsets are not silently converted to UTC: neither the forced nor the inferred column is a timestamp
+meta, _ = roundtrip(CASES["UTC offset"])
+assert meta["columns"][0]["type"] == "str" and meta["columns"][4]["type"] != "timestamp"
+
+# Ragged rows are rejected when the file is read, not when the payload is decoded
+try:
+    roundtrip([["2025-11-02T12:00:00.000Z", "3.3", "1200", "IDLE"]])
+except ValueError as e:
+    print(f"ragged row     OK ({e})")
+else:
+    raise AssertionError("A ragged row was accepted")
@@ -1,12 +1,19 @@
+from functools import lru_cache
 from scipy.signal import firwin, lfilter
 import numpy as np
 import matplotlib.pyplot as plt
-from numba import njit
 
 from .types_to_bin_func import *
 
+# Numba is optional: without it the vectorized numpy paths are used
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    def njit(func):
+        return func
 
-# TEST
 
 @njit
 def fast_bits_to_symbols(bits, bits_per_symbol):
@@ -20,14 +27,116 @@ def fast_bits_to_symbols(bits, bits_per_symbol):
     return symbols
 
 def bits_to_symbols(bits, M):
-    """Map bits to QAM symbols"""
+    """Map bits to QAM symbol indices (MSB first), the last symbol is zero padded"""
     bits_per_symbol = int(np.log2(M))
-    symbols = []
-    for i in range(0, len(bits), bits_per_symbol):
-        b = bits[i:i+bits_per_symbol]
-        k = int("".join(map(str, b)), 2)
-        symbols.append(k)
-    return np.array(symbols)
+    bits = np.asarray(bits, dtype=np.uint8)
+
+    # Pad to full symbols
+    if len(bits) % bits_per_symbol != 0:
+        bits = np.pad(bits, (0, bits_per_symbol - len(bits) % bits_per_symbol))
+
+    if HAVE_NUMBA:
+        return fast_bits_to_symbols(bits, bits_per_symbol)
+
+    # Reshape-and-dot: one row per symbol, weighted by the bit positions
+    weights = 1 << np.arange(bits_per_symbol - 1, -1, -1, dtype=np.int32)
+    return bits.reshape(-1, bits_per_symbol).astype(np.int32) @ weights
+
+def symbols_to_bits(symbols: np.ndarray, M: int) -> np.ndarray:
+    """Map QAM symbol indices back to bits (MSB first), as a uint8 array of 0s and 1s"""
+    bits_per_symbol = int(np.log2(M))
+    shifts = np.arange(bits_per_symbol - 1, -1, -1, dtype=np.int32)
+    return ((np.asarray(symbols, dtype=np.int32)[:, None] >> shifts) & 1).astype(np.uint8).reshape(-1)
+
+class qam_constellation:
+    """
+    Gray-coded QAM constellation of order M (4, 16, 64, 256, ...)\n
+    The first ceil(b/2) bits of a b-bit symbol select the I level and the other bits the Q level,
+    each with a Gray code, so that neighbouring points only differ by one bit.
+    Odd b (8, 32, 128-QAM) give a rectangular constellation with more I levels than Q levels.
+    The points are normalized to an average power of 1.
+    """
+    def __init__(self, M: int = 16):
+        bits_per_symbol = int(np.log2(M))
+        if M < 2 or 2**bits_per_symbol != M:
+            raise ValueError(f"The QAM order must be a power of 2, not {M}")
+
+        self.M = M
+        self.bits_per_symbol = bits_per_symbol
+        self.bits_i = (bits_per_symbol + 1) // 2
+        self.bits_q = bits_per_symbol - self.bits_i
+        self.levels_i = 1 << self.bits_i
+        self.levels_q = 1 << self.bits_q
+
+        # Decision lookup tables: level index along an axis -> Gray code of that level
+        self.gray_i = self._gray(np.arange(self.levels_i))
+        self.gray_q = self._gray(np.arange(self.levels_q))
+
+        # Inverse tables: Gray code -> level index
+        level_i = np.argsort(self.gray_i)
+        level_q = np.argsort(self.gray_q)
+
+        # Amplitudes (-L+1, ..., -1, +1, ..., L-1) and normalization to unit average power
+        k = np.arange(M)
+        I = 2.0 * level_i[k >> self.bits_q] - (self.levels_i - 1)
+        Q = 2.0 * level_q[k & (self.levels_q - 1)] - (self.levels_q - 1)
+        self.norm = float(np.sqrt(np.mean(I**2 + Q**2))) # Python float: keeps complex64 inputs in single precision
+        self.points = (I + 1j * Q) / self.norm
+
+    @staticmethod
+    def _gray(n: np.ndarray) -> np.ndarray:
+        return n ^ (n >> 1)
+
+    def modulate(self, symbols: np.ndarray, dtype=np.complex128) -> np.ndarray:
+        """Symbol indices -> constellation points (table lookup), as complex128 or complex64"""
+        return self.points.astype(dtype, copy=False)[symbols]
+
+    def _axis_levels(self, x: np.ndarray, levels: int) -> np.ndarray:
+        """Level index of the closest amplitude along one axis, O(1) per sample"""
+        level = np.rint((x * self.norm + (levels - 1)) / 2)
+        return np.clip(level, 0, levels - 1).astype(np.int32)
+
+    def decide(self, symbols_rx: np.ndarray) -> np.ndarray:
+        """Received points -> symbol indices, each axis is sliced independently"""
+        level_i = self._axis_levels(symbols_rx.real, self.levels_i)
+        level_q = self._axis_levels(symbols_rx.imag, self.levels_q)
+        return (self.gray_i[level_i] << self.bits_q) | self.gray_q[level_q]
+
+#####################################################################################
+# Radio sample formats
+
+CS16_SCALE = 4096.0 # full scale of the radio IQ samples (same as CaribouLiteRadio::ReadSamples/WriteSamples)
+
+def cs16_to_complex(iq: np.ndarray, dtype=np.complex64) -> np.ndarray:
+    """
+    Interleaved int16 I/Q samples (cariboulite_sample_complex_int16, shape (n, 2) or (2n,)) -> complex samples\n
+    One conversion pass: the float copy is reinterpreted as complex and scaled in place.
+    """
+    iq = np.asarray(iq, dtype=np.int16).reshape(-1)
+    samples = iq.astype(np.float32 if np.dtype(dtype) == np.complex64 else np.float64).view(dtype)
+    samples *= 1 / CS16_SCALE
+    return samples
+
+def complex_to_cs16(samples: np.ndarray) -> np.ndarray:
+    """Complex samples -> int16 I/Q pairs, shape (n, 2), laid out like an array of cariboulite_sample_complex_int16"""
+    parts = np.ascontiguousarray(samples, dtype=np.complex64).view(np.float32).reshape(-1, 2)
+    return np.clip(np.rint(parts * CS16_SCALE), -32768, 32767).astype(np.int16)
+
+def as_complex_samples(samples) -> np.ndarray:
+    """Accept complex64 / complex128 samples as they are (no copy) and convert int16 I/Q samples to complex64"""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return cs16_to_complex(samples)
+    if samples.dtype in (np.complex64, np.complex128):
+        return samples
+    return samples.astype(np.complex128)
+
+@lru_cache(maxsize=None)
+def lowpass_taps(numtaps: int, cutoff: float, fs: float) -> np.ndarray:
+    """FIR lowpass taps, computed once per (numtaps, cutoff, fs)"""
+    taps = firwin(numtaps, cutoff=cutoff, fs=fs)
+    taps.setflags(write=False) # shared by every caller
+    return taps
 
 def QAM_mod(bitstream: str,
             fc: float,
@@ -50,14 +159,8 @@ def QAM_mod(bitstream: str,
 
     symbols = bits_to_symbols(bits, M)
 
-    # --- Create constellation (Gray-coded) ---
-    # Map 0–15 to I/Q levels (-3,-1,+1,+3)
-    I = 2 * ((symbols % 4) - 1.5)
-    Q = 2 * ((symbols // 4) - 1.5)
-    qam_symbols = I + 1j * Q
-
-    # --- Normalize average power to 1 ---
-    qam_symbols /= np.sqrt((np.mean(np.abs(qam_symbols)**2)))
+    # --- Map to the Gray-coded constellation (average power of 1) ---
+    qam_symbols = qam_constellation(M).modulate(symbols)
 
     # --- Create baseband signal (each symbol lasts N samples) ---
     baseband = np.repeat(qam_symbols, samples_per_symbol)
@@ -80,7 +183,7 @@ def QAM_mod(bitstream: str,
     # # --- Constellation plot ---
     # plt.figure()
     # plt.scatter(np.real(qam_symbols), np.imag(qam_symbols))
-    # plt.title("16-QAM Constellation")
+    # plt.title(f"{M}-QAM Constellation")
     # plt.xlabel("In-phase")
     # plt.ylabel("Quadrature")
     # plt.grid(True)
@@ -90,12 +193,11 @@ def QAM_mod(bitstream: str,
     return rf_signal
 
 
-def QAM_demod(rf_signal: np.ndarray, fc: float, fs: float = 2e6, qam_order: int = 16, samples_per_symbol: int = 20):
-    """Demodulate a QAM RF signal back into a bitstream string."""
+def QAM_demod(rf_signal: np.ndarray, fc: float, fs: float = 2e6, qam_order: int = 16, samples_per_symbol: int = 20) -> bit_buffer:
+    """Demodulate a QAM RF signal back into a bitstream."""
 
     print("QAM demodulation ...")
     M = qam_order
-    bits_per_symbol = int(np.log2(M))
     Ts = 1 / fs
     t = np.arange(len(rf_signal)) * Ts
 
@@ -106,7 +208,7 @@ def QAM_demod(rf_signal: np.ndarray, fc: float, fs: float = 2e6, qam_order: int
 
     # --- Lowpass filter (simple averaging) ---
     # crude method; replace with proper filter for real SDR use
-    taps = firwin(101, cutoff=1/samples_per_symbol, fs=fs)
+    taps = lowpass_taps(101, 1/samples_per_symbol, fs)
     baseband_filtered = lfilter(taps, 1.0, baseband)
 
     # --- Symbol synchronization (assume perfect timing) ---
@@ -115,77 +217,323 @@ def QAM_demod(rf_signal: np.ndarray, fc: float, fs: float = 2e6, qam_order: int
     # --- Normalize power ---
     symbols_rx /= np.sqrt(np.mean(np.abs(symbols_rx)**2))
 
-    # --- Define ideal constellation points ---
-    I = 2 * ((np.arange(M) % 4) - 1.5)
-    Q = 2 * ((np.arange(M) // 4) - 1.5)
-    constellation = (I + 1j * Q) / np.sqrt(np.mean(np.abs(I + 1j * Q)**2))
-
-    # --- Nearest neighbor decoding ---
-    symbols_decoded = []
-    for s in symbols_rx:
-        distances = np.abs(s - constellation)
-        k_hat = np.argmin(distances)
-        symbols_decoded.append(k_hat)
-    symbols_decoded = np.array(symbols_decoded)
+    # --- Nearest neighbor decoding (per-axis slicing) ---
+    symbols_decoded = qam_constellation(M).decide(symbols_rx)
 
     # --- Convert symbols back to bits ---
-    bitstream = "".join(format(k, f'0{bits_per_symbol}b') for k in symbols_decoded)
+    return bit_buffer.from_bits(symbols_to_bits(symbols_decoded, M))
+
+class qam_stream_demodulator:
+    """
+    Stateful version of QAM_demod for continuous reception\n
+    Samples are pushed in chunks of any size with process(); the carrier phase, the lowpass
+    filter state (lfilter zi), the symbol sampling position and the power normalization are kept
+    between chunks. The power is estimated once, on the first 'power_symbols' symbols (held back
+    until they are all received), and kept for the rest of the stream: the bits do not depend on
+    where the recording is split. Call flush() at the end to decide a stream shorter than that.
+    """
+    def __init__(self, fc: float, fs: float = 2e6, qam_order: int = 16, samples_per_symbol: int = 20, numtaps: int = 101,
+                 power_symbols: int = 1024):
+        self.fc = fc
+        self.fs = fs
+        self.samples_per_symbol = samples_per_symbol
+        self.power_symbols = power_symbols
+        self.constellation = qam_constellation(qam_order)
+        self.taps = lowpass_taps(numtaps, 1/samples_per_symbol, fs)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the stream state (e.g. between two recordings)"""
+        self._zi = np.zeros(len(self.taps) - 1, dtype=np.complex128)
+        self._phase = 0.0        # carrier phase of the next sample (rad)
+        self._offset = 0         # index of the next symbol sample in the next chunk
+        self._scale = None       # power normalization, set once power_symbols symbols are received
+        self._pending = []       # symbols received before that
+
+    def _decide(self, symbols_rx: np.ndarray) -> bit_buffer:
+        symbols_decoded = self.constellation.decide(symbols_rx * self._scale)
+        return bit_buffer.from_bits(symbols_to_bits(symbols_decoded, self.constellation.M))
+
+    def _estimate_scale(self, symbols_rx: np.ndarray) -> None:
+        power = np.mean(symbols_rx.real**2 + symbols_rx.imag**2)
+        self._scale = 1 / np.sqrt(power) if power > 0 else 1.0
+
+    def process(self, rf_chunk: np.ndarray) -> bit_buffer:
+        """Demodulate the next chunk of RF samples and return the bits of the symbols it completes"""
+        n = len(rf_chunk)
+        if n == 0: # e.g. a read that timed out
+            return bit_buffer()
+
+        # --- Downconvert to baseband, continuing the carrier phase ---
+        phase = self._phase + 2 * np.pi * self.fc / self.fs * np.arange(n)
+        baseband = rf_chunk * np.exp(-1j * phase)
+        self._phase = (self._phase + 2 * np.pi * self.fc / self.fs * n) % (2 * np.pi)
+
+        # --- Lowpass filter, the filter state is carried to the next chunk ---
+        baseband_filtered, self._zi = lfilter(self.taps, 1.0, baseband, zi=self._zi)
+
+        # --- Symbol sampling, continuing the symbol grid ---
+        symbols_rx = baseband_filtered[self._offset::self.samples_per_symbol]
+        self._offset = (self._offset - n) % self.samples_per_symbol
+        if len(symbols_rx) == 0:
+            return bit_buffer()
+
+        # --- Normalize power (estimated on the first power_symbols symbols of the stream) ---
+        if self._scale is None:
+            self._pending.append(symbols_rx)
+            if sum(len(block) for block in self._pending) < self.power_symbols:
+                return bit_buffer()
+            symbols_rx = np.concatenate(self._pending)
+            self._pending = []
+            self._estimate_scale(symbols_rx[:self.power_symbols])
+
+        # --- Decision and bits ---
+        return self._decide(symbols_rx)
+
+    def flush(self) -> bit_buffer:
+        """End of the recording: decide the symbols still held back for the power estimate"""
+        if self._scale is not None or not self._pending:
+            return bit_buffer()
+        symbols_rx = np.concatenate(self._pending)
+        self._pending = []
+        self._estimate_scale(symbols_rx)
+        return self._decide(symbols_rx)
+
+def QAM_demod_stream(rf_chunks, fc: float, fs: float = 2e6, qam_order: int = 16, samples_per_symbol: int = 20):
+    """Demodulate an iterable of RF sample chunks (e.g. blocks read from the radio), yielding the bits of each chunk"""
+    demodulator = qam_stream_demodulator(fc, fs, qam_order, samples_per_symbol)
+    for rf_chunk in rf_chunks:
+        yield demodulator.process(rf_chunk)
+    yield demodulator.flush()
 
-    return bitstream
+#####################################################################################
+# Symbol timing recovery (Gardner timing error detector)
+
+INTERP_PHASES = 32 # fractional delays of the polyphase interpolator
+INTERP_TAPS = 8    # taps per phase, the interpolated point is between taps 3 and 4
+
+@lru_cache(maxsize=None)
+def polyphase_interpolator(phases: int = INTERP_PHASES, ntaps: int = INTERP_TAPS) -> np.ndarray:
+    """
+    Bank of windowed-sinc fractional delay filters, shape (phases + 1, ntaps)\n
+    Row p interpolates x at (i + p / phases) from x[i - ntaps/2 + 1 : i + ntaps/2 + 1].
+    """
+    k = np.arange(ntaps) - (ntaps // 2 - 1)
+    frac = np.arange(phases + 1)[:, None] / phases
+    bank = np.sinc(k[None, :] - frac) * np.kaiser(ntaps + 1, 5.0)[None, :ntaps]
+    bank /= bank.sum(axis=1, keepdims=True) # unit DC gain for every phase
+    bank.setflags(write=False)
+    return bank
+
+def gardner_gains(loop_bw: float, damping: float = 1.0) -> tuple[float, float]:
+    """Proportional and integral gains of the timing loop (loop_bw normalized to the symbol rate)"""
+    theta = loop_bw / (damping + 1 / (4 * damping))
+    d = 1 + 2 * damping * theta + theta**2
+    return 4 * damping * theta / d, 4 * theta**2 / d
+
+@njit
+def _interpolate(x, t, bank):
+    phases = bank.shape[0] - 1
+    half = bank.shape[1] // 2 - 1
+    i = int(np.floor(t))
+    p = int(np.rint((t - i) * phases))
+    acc = 0j
+    for k in range(bank.shape[1]):
+        acc += bank[p, k] * x[i - half + k]
+    return acc
+
+@njit
+def _gardner_loop(x, sps, bank, t, integrator, prev, k1, k2, out):
+    """
+    Timing loop over one block: x holds the block (with the history needed by the interpolator),
+    t is the position of the next strobe. Return the number of symbols written in 'out' and the loop state.
+    """
+    half = bank.shape[1] // 2
+    n = 0
+    while np.floor(t) + half < x.shape[0] and n < out.shape[0]:
+        sym = _interpolate(x, t, bank)
+        mid = _interpolate(x, t - sps / 2, bank)
+
+        # Gardner error: zero when the mid-point sample sits on the symbol transition
+        err = (mid.real * (sym.real - prev.real) + mid.imag * (sym.imag - prev.imag))
+        integrator += k2 * err
+        out[n] = sym
+        n += 1
+        prev = sym
+
+        # Next strobe, the correction is limited to half a symbol
+        adjust = min(max(k1 * err + integrator, -sps / 2), sps / 2)
+        t += sps - adjust
+    return n, t, integrator, prev
+
+class symbol_timing_recovery:
+    """
+    Recover the symbol timing of an oversampled baseband signal, block by block\n
+    A Gardner timing error detector drives a PI loop which moves the sampling instant; the symbols
+    are read between samples with a polyphase interpolator, so 2 to 4 samples per symbol are enough.
+    The loop state and the last samples are kept between blocks.
+    """
+    def __init__(self, samples_per_symbol: float, loop_bw: float = 0.01, damping: float = 1.0, dtype=np.complex128):
+        self.samples_per_symbol = samples_per_symbol
+        self.dtype = np.dtype(dtype)
+        self.k1, self.k2 = gardner_gains(loop_bw, damping)
+        self.bank = polyphase_interpolator()
+        self.reset()
+
+    def reset(self) -> None:
+        self._history = np.zeros(int(np.ceil(self.samples_per_symbol / 2)) + INTERP_TAPS, dtype=self.dtype)
+        self._t = float(len(self._history))  # next strobe, relative to the history start
+        self._integrator = 0.0
+        self._prev = 0j
+        self._scale = None                   # amplitude normalization of the error (first block)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Return the symbols strobed in this block"""
+        block = np.asarray(block, dtype=self.dtype)
+        if self._scale is None and len(block):
+            self._scale = 1 / float(np.sqrt(np.mean(block.real**2 + block.imag**2)) or 1.0)
+        x = np.concatenate((self._history, block * self._scale))
+
+        out = np.empty(int(2 * len(x) / self.samples_per_symbol) + 2, dtype=self.dtype)
+        n, self._t, self._integrator, self._prev = _gardner_loop(x, float(self.samples_per_symbol), self.bank,
+                                                                  self._t, self._integrator, self._prev,
+                                                                  self.k1, self.k2, out)
+
+        # Keep what the interpolator needs for the next strobe and its mid-point
+        keep = max(int(np.floor(self._t - self.samples_per_symbol / 2)) - INTERP_TAPS, 0)
+        self._history = x[keep:]
+        self._t -= keep
+        return out[:n] / self._scale
+
+#####################################################################################
+# Pulse shaping (root-raised cosine)
+
+RRC_SPAN = 8 # length of the RRC filter in symbols
+
+@lru_cache(maxsize=None)
+def rrc_taps(samples_per_symbol: int, rolloff: float = 0.35, span: int = RRC_SPAN) -> np.ndarray:
+    """
+    Root-raised-cosine taps (span * samples_per_symbol + 1 taps, unit energy)\n
+    The same filter is used to shape the symbols and as matched filter, the cascade is a raised
+    cosine: no inter-symbol interference and a spectrum of (1 + rolloff) x the symbol rate.
+    """
+    t = np.arange(-span * samples_per_symbol / 2, span * samples_per_symbol / 2 + 1) / samples_per_symbol
+    b = rolloff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taps = (np.sin(np.pi * t * (1 - b)) + 4 * b * t * np.cos(np.pi * t * (1 + b))) \
+               / (np.pi * t * (1 - (4 * b * t)**2))
+    # Removable singularities at t = 0 and t = +-1/(4 rolloff)
+    taps[t == 0] = 1 - b + 4 * b / np.pi
+    if b > 0:
+        taps[np.isclose(np.abs(t), 1 / (4 * b))] = b / np.sqrt(2) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * b))
+                                                                     + (1 - 2 / np.pi) * np.cos(np.pi / (4 * b)))
+    taps /= np.sqrt(np.sum(taps**2))
+    taps.setflags(write=False)
+    return taps
+
+def polyphase_upsample(symbols: np.ndarray, taps: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Upsample by 'factor' and filter, without computing the products with the stuffed zeros\n
+    Output phase p is the convolution of the symbols with taps[p::factor];
+    length (len(symbols) + ceil(len(taps) / factor) - 1) * factor.
+    """
+    taps = taps.astype(symbols.real.dtype, copy=False)
+    n_phase = -(-len(taps) // factor)
+    out = np.zeros((len(symbols) + n_phase - 1, factor), dtype=symbols.dtype)
+    if len(symbols) == 0: # only the (zero) filter tails
+        return out.reshape(-1)
+    for p in range(factor):
+        phase = np.convolve(symbols, taps[p::factor])
+        out[:len(phase), p] = phase
+    return out.reshape(-1)
+
+def polyphase_decimate(x: np.ndarray, taps: np.ndarray, factor: int, offset: int = 0) -> np.ndarray:
+    """
+    Filter and keep one output sample out of 'factor', starting at 'offset': y[m] = (x * taps)[offset + m * factor]\n
+    Only the kept outputs are computed: x and the taps are split in 'factor' phases.
+    """
+    taps = taps.astype(x.real.dtype, copy=False)
+    n_out = max(-(-(len(x) + len(taps) - 1 - offset) // factor), 0)
+    y = np.zeros(n_out, dtype=x.dtype)
+    xpad = np.concatenate((np.zeros(factor - 1, dtype=x.dtype), x))
+    for p in range(min(factor, len(taps))):
+        # Phase p sees x[offset - p + j * factor]: the whole phase of x is filtered, then shifted
+        start = offset - p + factor - 1
+        if len(xpad[start % factor::factor]) == 0:
+            continue
+        phase = np.convolve(xpad[start % factor::factor], taps[p::factor])[start // factor:start // factor + n_out]
+        y[:len(phase)] += phase
+    return y
 
 #####################################################################################
 # Simplified version?
 
-def QAM_mod_baseband(bitstream: str, qam_order: int = 16, samples_per_symbol: int = 8):
-    """Modulate a bitstream with a QAM of any order"""
+def QAM_mod_baseband(bitstream: str, qam_order: int = 16, samples_per_symbol: int = 8, dtype=np.complex128,
+                     pulse: str = "rect", rolloff: float = 0.35):
+    """
+    Modulate a bitstream with a QAM of any order (complex64 halves the memory and matches the radio API)\n
+    pulse="rrc" shapes the symbols with a root-raised cosine (bandwidth (1 + rolloff) x symbol rate,
+    RRC_SPAN more symbols of filter tails), pulse="rect" repeats each symbol samples_per_symbol times.
+    """
 
     print("QAM modulation ...")
     M = qam_order
-    bits = np.fromiter((int(b) for b in bitstream), dtype=np.uint8)
-    bits_per_symbol = int(np.log2(M))
-    
-    # Pad to full symbols
-    if len(bits) % bits_per_symbol != 0:
-        bits = np.pad(bits, (0, bits_per_symbol - len(bits) % bits_per_symbol))
-    
-    symbols = []
-    for i in range(0, len(bits), bits_per_symbol):
-        b = bits[i:i+bits_per_symbol]
-        symbols.append(int("".join(map(str, b)), 2))
-    symbols = np.array(symbols)
+    bits = bitstring_to_array(bitstream)
+
+    # Pad to full symbols and pack
+    symbols = bits_to_symbols(bits, M)
     
     # QAM constellation
-    I = 2 * ((symbols % 4) - 1.5)
-    Q = 2 * ((symbols // 4) - 1.5)
-    qam_symbols = (I + 1j * Q)
-    qam_symbols /= np.sqrt(np.mean(np.abs(qam_symbols)**2))
+    qam_symbols = qam_constellation(M).modulate(symbols, dtype)
     
     # Pulse shaping
-    baseband = np.repeat(qam_symbols, samples_per_symbol)
-    return baseband
-
-def QAM_demod_baseband(baseband, qam_order: int = 16, samples_per_symbol: int = 8):
-    """Demodulate a QAM RF signal back into a bitstream string."""
+    if pulse == "rrc":
+        return polyphase_upsample(qam_symbols, rrc_taps(samples_per_symbol, rolloff), samples_per_symbol)
+    if pulse == "rect":
+        return np.repeat(qam_symbols, samples_per_symbol)
+    raise ValueError(f"Unknown pulse shape '{pulse}', use 'rrc' or 'rect'")
+
+def QAM_demod_baseband(baseband, qam_order: int = 16, samples_per_symbol: int = 8, timing_recovery: bool = None,
+                       pulse: str = "rect", rolloff: float = 0.35) -> bit_buffer:
+    """
+    Demodulate a QAM RF signal back into a bitstream.
+    The baseband can be complex128, complex64 (kept in single precision) or int16 I/Q from the radio.
+    pulse must match the modulator: "rrc" applies the matched filter, decimated to 2 samples per symbol
+    (for an even samples_per_symbol) in the same polyphase pass.
+    With timing_recovery the symbol instants are tracked (Gardner), otherwise perfect timing is assumed.
+    By default it is on for "rrc" and off for "rect": flat rect pulses give the loop no timing error to track.
+    """
 
     print("QAM demodulation ...\n")
     M = qam_order
-    bits_per_symbol = int(np.log2(M))
-
-    # Symbol timing (perfect)
-    symbols_rx = baseband[::samples_per_symbol]
-    symbols_rx /= np.sqrt(np.mean(np.abs(symbols_rx)**2))
-
-    # Reference constellation
-    I = 2 * ((np.arange(M) % 4) - 1.5)
-    Q = 2 * ((np.arange(M) // 4) - 1.5)
-    constellation = (I + 1j * Q) / np.sqrt(np.mean(np.abs(I + 1j * Q)**2))
-
-    # Decision
-    decoded = []
-    for s in symbols_rx:
-        k = np.argmin(np.abs(s - constellation))
-        decoded.append(k)
+    baseband = as_complex_samples(baseband)
+    sps = samples_per_symbol
+    n_symbols = -(-len(baseband) // sps)
+
+    # Matched filter: symbol k peaks at k * sps + RRC_SPAN * sps (delay of the two filters)
+    if pulse == "rrc":
+        factor = sps // 2 if sps % 2 == 0 else 1
+        baseband = polyphase_decimate(baseband, rrc_taps(sps, rolloff), factor, RRC_SPAN * sps)
+        n_symbols = len(baseband) * factor // sps - RRC_SPAN
+        sps //= factor
+    elif pulse != "rect":
+        raise ValueError(f"Unknown pulse shape '{pulse}', use 'rrc' or 'rect'")
+    if n_symbols <= 0:
+        return bit_buffer()
+
+    # Symbol timing
+    if timing_recovery is None:
+        timing_recovery = pulse == "rrc"
+    if timing_recovery:
+        # The interpolator looks a few samples ahead: repeat the last sample so that the last symbols are strobed too
+        padded = np.pad(baseband, (0, INTERP_TAPS + sps), mode="edge")
+        symbols_rx = symbol_timing_recovery(sps, dtype=baseband.dtype).process(padded)[:n_symbols]
+    else:
+        symbols_rx = baseband[::sps][:n_symbols]
+    symbols_rx = symbols_rx / np.sqrt(np.mean(np.abs(symbols_rx)**2))
+
+    # Decision (per-axis slicing)
+    decoded = qam_constellation(M).decide(symbols_rx)
 
     # Convert back to bits
-    bitstream = "".join(format(k, f'0{bits_per_symbol}b') for k in decoded)
-    return bitstream
\ No newline at end of file
+    return bit_buffer.from_bits(symbols_to_bits(decoded, M))
\ No newline at end of file
@@ -0,0 +1,37 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class background_writer:
+    """
+    Run file writes on worker threads so that the decoding loop never waits for the disk\n
+    Use wait() (or the context manager) to make sure every file has been written;
+    errors raised by a write are re-raised there.
+    """
+    def __init__(self, max_workers: int = 1):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background_writer")
+        self._futures = []
+
+    def submit(self, func, *args) -> Future:
+        """Schedule func(*args) on the writer thread and return its future."""
+        future = self._pool.submit(func, *args)
+        self._futures.append(future)
+        return future
+
+    def wait(self) -> None:
+        """Block until all the submitted writes are done."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """Wait for the pending writes and stop the worker threads."""
+        try:
+            self.wait()
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self) -> "background_writer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,18 +1,57 @@
-def bitstring_to_binfile(bitstring: str, filepath: str) -> None:
-    """Write a bitstring (e.g. '11001010') to a binary .bin file."""
-    # Pad to full bytes (8 bits per byte)
-    padding = (8 - len(bitstring) % 8) % 8
-    bitstring_padded = bitstring + '0' * padding
+import struct
 
-    # Convert to bytes
-    byte_array = int(bitstring_padded, 2).to_bytes(len(bitstring_padded) // 8, byteorder='big')
+from .bit_buffer import bit_buffer, as_bit_buffer
+from .file_management_func import file_to_bitstring, bitstring_to_file, map_file
 
-    # Write binary file
-    with open(filepath, 'wb') as f:
-        f.write(byte_array)
+def bitstring_to_binfile(bitstring: bit_buffer | str, filepath: str) -> None:
+    """Write a bit buffer (or a bitstring, e.g. '11001010') to a binary .bin file, padded to full bytes."""
+    bitstring_to_file(bitstring, filepath)
 
-def binfile_to_bitstring(filepath: str) -> str:
-    """Read a binary .bin file and return its bitstring representation."""
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    return ''.join(f'{byte:08b}' for byte in data)
\ No newline at end of file
+def binfile_to_bitstring(filepath: str) -> bit_buffer:
+    """Read a binary .bin file and return its bit buffer representation."""
+    return file_to_bitstring(filepath)
+
+
+##### Packed bitstream files (read by the C transmitter) #####
+# b"OOKB" | bit count (uint64, big-endian) | bits packed MSB-first, last byte zero padded
+BITSTREAM_MAGIC = b"OOKB"
+BITSTREAM_HEADER = struct.Struct(">4sQ")
+
+def write_bitstream_file(bits, filepath: str) -> int:
+    """
+    Write a bitstream in the packed format understood by main.c (8 bits per byte instead of one '0'/'1' character per bit)\n
+    'bits' is a bit buffer / bitstring, or an iterable of them (e.g. payload.iter_frame()) written chunk by chunk.
+    Return the number of bits written.
+    """
+    chunks = [bits] if isinstance(bits, (bit_buffer, str)) else bits
+    nbits = 0
+    carry = bit_buffer()
+    with open(filepath, "wb") as f:
+        f.write(BITSTREAM_HEADER.pack(BITSTREAM_MAGIC, 0))
+        for chunk in chunks:
+            chunk = as_bit_buffer(chunk)
+            nbits += chunk.nbits
+            if carry.nbits:
+                chunk = carry + chunk
+            # Whole bytes are written, the remaining bits are carried over to the next chunk
+            whole = chunk.nbits // 8
+            f.write(chunk.data[:whole])
+            carry = chunk.bit_slice(whole * 8, chunk.nbits)
+        if carry.nbits:
+            f.write(carry.tobytes())
+        f.seek(0)
+        f.write(BITSTREAM_HEADER.pack(BITSTREAM_MAGIC, nbits))
+    return nbits
+
+def read_bitstream_file(filepath: str) -> bit_buffer:
+    """
+    Read a bitstream file written by write_bitstream_file() (zero-copy view on the mapped file)\n
+    Files without the header are read as '0'/'1' text (legacy bitstream.txt).
+    """
+    data = map_file(filepath)
+    if data[:len(BITSTREAM_MAGIC)].tobytes() != BITSTREAM_MAGIC:
+        return bit_buffer.from_bits(data[(data == ord('0')) | (data == ord('1'))] - ord('0'))
+    if data.size < BITSTREAM_HEADER.size:
+        raise ValueError(f"Truncated bitstream file: {filepath}")
+    _, nbits = BITSTREAM_HEADER.unpack(data[:BITSTREAM_HEADER.size].tobytes())
+    return bit_buffer(data[BITSTREAM_HEADER.size:], nbits)
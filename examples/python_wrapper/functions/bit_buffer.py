@@ -0,0 +1,187 @@
+import numpy as np
+
+
+class bit_buffer:
+    """
+    Packed bit container used to move binary payloads around\n
+    The bits are stored MSB-first in a numpy uint8 array (np.packbits/np.unpackbits layout),
+    which takes 8x less memory than a '0'/'1' Python string.
+    Bits stored after 'nbits' in the last byte are padding and are always ignored.
+    """
+    __slots__ = ("data", "nbits")
+
+    def __init__(self, data: np.ndarray = None, nbits: int = None):
+        if data is None:
+            data = np.zeros(0, dtype=np.uint8)
+        data = np.asarray(data, dtype=np.uint8).reshape(-1)
+        if nbits is None:
+            nbits = data.size * 8
+        if nbits < 0 or nbits > data.size * 8:
+            raise ValueError(f"A buffer of {data.size} bytes cannot hold {nbits} bits.")
+
+        self.data = data
+        self.nbits = nbits
+
+    ##### Constructors #####
+    @classmethod
+    def from_bytes(cls, raw, nbits: int = None) -> "bit_buffer":
+        """Wrap a bytes-like object (bytes, bytearray, memoryview, mmap) without copying it."""
+        return cls(np.frombuffer(raw, dtype=np.uint8), nbits)
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray) -> "bit_buffer":
+        """Pack an array of 0s and 1s (one element per bit)."""
+        bits = np.asarray(bits, dtype=np.uint8).reshape(-1)
+        return cls(np.packbits(bits), bits.size)
+
+    @classmethod
+    def from_bitstring(cls, bitstring: str) -> "bit_buffer":
+        """Pack a string of '0'/'1' characters (e.g. '110010')."""
+        bits = np.frombuffer(bitstring.encode("ascii"), dtype=np.uint8) - ord("0")
+        if bits.size and bits.max() > 1:
+            raise ValueError("A bitstring can only contain '0' and '1' characters.")
+        return cls.from_bits(bits)
+
+    @classmethod
+    def from_int(cls, value: int, nbits: int = None) -> "bit_buffer":
+        """Unsigned integer on 'nbits' bits (minimal width when nbits is None, like format(n, 'b'))."""
+        if value < 0:
+            raise ValueError("Only unsigned integers can be stored in a bit buffer.")
+        if nbits is None:
+            nbits = max(value.bit_length(), 1)
+        nbytes = (nbits + 7) // 8
+        # Left-align the value so that the padding ends up in the last byte
+        raw = (value << (nbytes * 8 - nbits)).to_bytes(nbytes, byteorder="big")
+        return cls.from_bytes(raw, nbits)
+
+    @classmethod
+    def join(cls, buffers) -> "bit_buffer":
+        """
+        Concatenate several buffers (or bitstrings) in a single pass\n
+        Every piece is copied once into the output, shifted to its bit offset (same shift/or as bit_slice):
+        nothing is unpacked to one byte per bit.
+        """
+        buffers = [as_bit_buffer(b) for b in buffers]
+        nbits = sum(b.nbits for b in buffers)
+        # One spare byte: the last unaligned piece spills its padding bits one byte further
+        out = np.zeros((nbits + 7) // 8 + 1, dtype=np.uint8)
+        pos = 0
+        for b in buffers:
+            if b.nbits == 0:
+                continue
+            first = pos // 8
+            shift = pos % 8
+            nbytes = (b.nbits + 7) // 8
+            src = b.data[:nbytes]
+            if shift == 0:
+                out[first:first + nbytes] = src
+            else:
+                out[first:first + nbytes] |= src >> shift
+                out[first + 1:first + nbytes + 1] |= src << (8 - shift) # uint8: the high bits fall off
+            pos += b.nbits
+            # Clear the padding bits of the piece, the next one is or-ed over them
+            if pos % 8:
+                out[pos // 8] &= (0xFF << (8 - pos % 8)) & 0xFF
+            out[(pos + 7) // 8:first + nbytes + 1] = 0
+        return cls(out[:(nbits + 7) // 8], nbits)
+
+    ##### Views #####
+    def unpacked(self) -> np.ndarray:
+        """Return the bits as a uint8 array of 0s and 1s (one element per bit)."""
+        return np.unpackbits(self.data, count=self.nbits)
+
+    def tobytes(self) -> bytes:
+        """Return the packed bytes (the last byte is zero padded)."""
+        nbytes = (self.nbits + 7) // 8
+        out = self.data[:nbytes].copy()
+        if self.nbits % 8:
+            out[-1] &= (0xFF << (8 - self.nbits % 8)) & 0xFF
+        return out.tobytes()
+
+    def memview(self) -> memoryview:
+        """Return the packed bytes as a memoryview (zero-copy when the length is a multiple of 8 bits)."""
+        if self.nbits % 8:
+            return memoryview(self.tobytes())
+        return memoryview(self.data[:self.nbits // 8])
+
+    def to_bitstring(self) -> str:
+        """Debug view: return the content as a string of '0'/'1' characters."""
+        return (self.unpacked() + ord("0")).tobytes().decode("ascii")
+
+    def to_int(self) -> int:
+        """Interpret the whole buffer as an unsigned big-endian integer."""
+        if self.nbits == 0:
+            raise ValueError("Cannot convert an empty bit buffer to an integer.")
+        nbytes = (self.nbits + 7) // 8
+        return int.from_bytes(self.data[:nbytes].tobytes(), byteorder="big") >> (nbytes * 8 - self.nbits)
+
+    def read_uint(self, offset: int, nbits: int) -> int:
+        """Read an unsigned big-endian integer of 'nbits' bits starting at bit 'offset'."""
+        if offset < 0 or offset + nbits > self.nbits:
+            raise IndexError("Read past the end of the bit buffer.")
+        first = offset // 8
+        last = (offset + nbits + 7) // 8
+        value = int.from_bytes(self.data[first:last].tobytes(), byteorder="big")
+        value >>= last * 8 - offset - nbits
+        return value & ((1 << nbits) - 1)
+
+    def bit_slice(self, start: int, stop: int) -> "bit_buffer":
+        """
+        Return the bits [start, stop) as a new buffer\n
+        Byte-aligned slices share memory with this buffer, unaligned ones are realigned in one vectorized pass.
+        """
+        start = max(start, 0)
+        stop = min(stop, self.nbits)
+        nbits = max(stop - start, 0)
+        first = start // 8
+        shift = start % 8
+        nbytes = (nbits + 7) // 8
+        if shift == 0:
+            return bit_buffer(self.data[first:first + nbytes], nbits)
+
+        seg = self.data[first:(stop + 7) // 8].astype(np.uint16)
+        out = (seg << shift) & 0xFF
+        out[:-1] |= seg[1:] >> (8 - shift)
+        return bit_buffer(out[:nbytes].astype(np.uint8), nbits)
+
+    ##### Python protocol #####
+    def __len__(self) -> int:
+        return self.nbits
+
+    def __add__(self, other) -> "bit_buffer":
+        return bit_buffer.join([self, other])
+
+    def __radd__(self, other) -> "bit_buffer":
+        return bit_buffer.join([other, self])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.nbits)
+            if step != 1:
+                return bit_buffer.from_bits(self.unpacked()[key])
+            return self.bit_slice(start, stop)
+        if key < 0:
+            key += self.nbits
+        return self.read_uint(key, 1)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, str):
+            other = bit_buffer.from_bitstring(other)
+        if not isinstance(other, bit_buffer):
+            return NotImplemented
+        return self.nbits == other.nbits and self.tobytes() == other.tobytes()
+
+    def __repr__(self) -> str:
+        preview = self.bit_slice(0, 64).to_bitstring()
+        return f"bit_buffer(nbits={self.nbits}, bits='{preview}{'...' if self.nbits > 64 else ''}')"
+
+
+def as_bit_buffer(bits) -> bit_buffer:
+    """Accept a bit_buffer, a '0'/'1' string, bytes-like data or an array of 0s and 1s and return a bit_buffer."""
+    if isinstance(bits, bit_buffer):
+        return bits
+    if isinstance(bits, str):
+        return bit_buffer.from_bitstring(bits)
+    if isinstance(bits, np.ndarray):
+        return bit_buffer.from_bits(bits)
+    return bit_buffer.from_bytes(bits)
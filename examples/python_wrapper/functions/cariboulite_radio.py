@@ -1,8 +1,16 @@
+import asyncio
 import ctypes
+import numbers
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
+from .bit_buffer import bit_buffer
+
 # Make sure you build the C tool with this command:
-# gcc -shared -fPIC -o libcariboulite_radio.so main.c -lcariboulite -lm
+# gcc -shared -fPIC -o libcariboulite_radio.so main.c -lcariboulite -lm -lpthread
 
 # Load the shared library
 _lib = ctypes.CDLL(str(Path(__file__).with_name("libcariboulite_radio.so")))
@@ -18,19 +26,81 @@ _lib.transmit.argtypes = [
 ]
 _lib.transmit.restype = ctypes.c_int
 
-def transmit(sample_rate, tx_freq, tx_bw, tx_power, filepath, channel="s1g"):
-    """
-    Transmit a bitstream using OOK modulation on CaribouLite.
+_lib.transmit_iq.argtypes = [
+    ctypes.c_double,  # sample_rate
+    ctypes.c_double,  # tx_freq
+    ctypes.c_double,  # tx_bw
+    ctypes.c_int,     # tx_power
+    ctypes.c_char_p,  # filepath
+    ctypes.c_char_p,  # Channel
+    ctypes.c_double   # bit_rate
+]
+_lib.transmit_iq.restype = ctypes.c_int
 
-    Args:
-        sample_rate (float): Sample rate in Hz
-        tx_freq (float): TX frequency in Hz
-        tx_bw (float): Bandwidth in Hz
-        tx_power (int): Power in dBm
-        filepath (str): Path to bitstream text file
-	channel (str): channel choice ("s1g" or "hif")
-    """
+# Session functions (radio_session)
+class tx_control(ctypes.Structure):
+    """Progress / cancellation block shared with the C transmission loop (tx_control in main.c)"""
+    _fields_ = [("bits_sent", ctypes.c_long),
+                ("total_bits", ctypes.c_long),
+                ("cancel", ctypes.c_int)]
+
+TX_CANCELLED = 1 # return code of a cancelled transmission
+RX_GAIN_MAX_DB = 69 # 23 steps of 3 dB (cariboulite_radio_get_rx_gain_limits)
+_tx_control_p = ctypes.POINTER(tx_control)
+
+_lib.radio_open.argtypes = [ctypes.c_char_p]
+_lib.radio_open.restype = ctypes.c_void_p
+_lib.radio_set_frequency.argtypes = [ctypes.c_void_p, ctypes.c_double]
+_lib.radio_set_frequency.restype = ctypes.c_int
+_lib.radio_set_tx_power.argtypes = [ctypes.c_void_p, ctypes.c_int]
+_lib.radio_set_tx_power.restype = ctypes.c_int
+_lib.radio_set_tx_bandwidth.argtypes = [ctypes.c_void_p, ctypes.c_double]
+_lib.radio_set_tx_bandwidth.restype = ctypes.c_int
+_lib.radio_set_sample_rate.argtypes = [ctypes.c_void_p, ctypes.c_double]
+_lib.radio_set_sample_rate.restype = ctypes.c_double
+_lib.radio_send_keyed.argtypes = [ctypes.c_void_p, ctypes.c_char_p, _tx_control_p]
+_lib.radio_send_keyed.restype = ctypes.c_int
+_lib.radio_send_iq.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_double, _tx_control_p]
+_lib.radio_send_iq.restype = ctypes.c_int
+_lib.radio_send_keyed_bits.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_long, _tx_control_p]
+_lib.radio_send_keyed_bits.restype = ctypes.c_int
+_lib.radio_send_iq_bits.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_long, ctypes.c_double, _tx_control_p]
+_lib.radio_send_iq_bits.restype = ctypes.c_int
+_lib.radio_start_receiving.argtypes = [ctypes.c_void_p, ctypes.c_double, ctypes.c_double, ctypes.c_int, ctypes.c_int]
+_lib.radio_start_receiving.restype = ctypes.c_double
+_lib.radio_stop_receiving.argtypes = [ctypes.c_void_p]
+_lib.radio_stop_receiving.restype = None
+_lib.radio_read_samples_cs16.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+_lib.radio_read_samples_cs16.restype = ctypes.c_int
+_lib.radio_read_samples_cf32.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+_lib.radio_read_samples_cf32.restype = ctypes.c_int
 
+# Streaming reception (rx_stream)
+class rx_ring_state(ctypes.Structure):
+    """Counters shared with the C reader thread of an rx_stream (rx_ring_state in main.c)"""
+    _fields_ = [("head", ctypes.c_long),
+                ("tail", ctypes.c_long),
+                ("overruns", ctypes.c_long),
+                ("errors", ctypes.c_long),
+                ("running", ctypes.c_int)]
+
+_lib.radio_mtu_samples.argtypes = [ctypes.c_void_p]
+_lib.radio_mtu_samples.restype = ctypes.c_size_t
+_lib.radio_stream_start.argtypes = [ctypes.c_void_p, ctypes.POINTER(rx_ring_state), ctypes.c_void_p, ctypes.c_void_p,
+                                    ctypes.c_void_p, ctypes.c_long, ctypes.c_long, ctypes.c_int]
+_lib.radio_stream_start.restype = ctypes.c_void_p
+_lib.radio_stream_wait.argtypes = [ctypes.POINTER(rx_ring_state), ctypes.c_int]
+_lib.radio_stream_wait.restype = ctypes.c_long
+_lib.radio_stream_release.argtypes = [ctypes.POINTER(rx_ring_state)]
+_lib.radio_stream_release.restype = None
+_lib.radio_stream_stop.argtypes = [ctypes.c_void_p]
+_lib.radio_stream_stop.restype = None
+
+_lib.radio_close.argtypes = [ctypes.c_void_p]
+_lib.radio_close.restype = None
+
+def _check_tx_params(sample_rate, tx_freq, tx_bw, tx_power, channel):
+    """Raise if the TX parameters are out of the CaribouLite range"""
     if channel != "s1g" and channel != "hif":
         raise NameError(f'"{channel}" is not correct\nThe channel choices are either "s1b" or "hif"')
 
@@ -49,6 +119,37 @@ def transmit(sample_rate, tx_freq, tx_bw, tx_power, filepath, channel="s1g"):
     if tx_power > 14:
         raise ValueError("The maximum TX power allowed by the cariboulite is 14 dB")
 
+def _packed_bits(bits, nbits=None):
+    """
+    Packed bytes (MSB-first) of a bit buffer or of a bytes-like / numpy buffer, and their number of bits\n
+    The memory is shared with 'bits' (buffer protocol), nothing is copied.
+    """
+    if isinstance(bits, bit_buffer):
+        data = bits.data
+        nbits = bits.nbits if nbits is None else nbits
+    else:
+        data = np.frombuffer(bits, dtype=np.uint8)
+    if nbits is None:
+        nbits = data.size * 8
+    if not 0 <= nbits <= data.size * 8:
+        raise ValueError(f"A buffer of {data.size} bytes cannot hold {nbits} bits.")
+    return data, nbits
+
+def transmit(sample_rate, tx_freq, tx_bw, tx_power, filepath, channel="s1g"):
+    """
+    Transmit a bitstream using OOK modulation on CaribouLite.
+
+    Args:
+        sample_rate (float): Sample rate in Hz
+        tx_freq (float): TX frequency in Hz
+        tx_bw (float): Bandwidth in Hz
+        tx_power (int): Power in dBm
+        filepath (str): Path to bitstream file (packed .bits or '0'/'1' .txt)
+	channel (str): channel choice ("s1g" or "hif")
+    """
+
+    _check_tx_params(sample_rate, tx_freq, tx_bw, tx_power, channel)
+
     result = _lib.transmit(
         ctypes.c_double(sample_rate),
         ctypes.c_double(tx_freq),
@@ -59,3 +160,425 @@ def transmit(sample_rate, tx_freq, tx_bw, tx_power, filepath, channel="s1g"):
     )
     if result != 0:
         raise RuntimeError(f"Transmission failed with code {result}")
+
+def transmit_iq(sample_rate, tx_freq, tx_bw, tx_power, filepath, channel="s1g", bit_rate=100e3):
+    """
+    Transmit a bitstream using OOK modulation on CaribouLite, with sample-accurate timing.
+
+    The on/off envelope is synthesized as IQ samples and streamed at the sample rate
+    (instead of keying the CW with usleep like transmit()), each bit lasting sample_rate / bit_rate samples.
+
+    Args:
+        sample_rate (float): Sample rate in Hz
+        tx_freq (float): TX frequency in Hz
+        tx_bw (float): Bandwidth in Hz
+        tx_power (int): Power in dBm
+        filepath (str): Path to bitstream file (packed .bits or '0'/'1' .txt)
+        channel (str): channel choice ("s1g" or "hif")
+        bit_rate (float): Bit rate in bit/s, at most the sample rate
+    """
+
+    _check_tx_params(sample_rate, tx_freq, tx_bw, tx_power, channel)
+
+    if not 0 < bit_rate <= sample_rate:
+        raise ValueError("The bit rate must be positive and at most the samplerate (one sample per bit)")
+
+    result = _lib.transmit_iq(
+        ctypes.c_double(sample_rate),
+        ctypes.c_double(tx_freq),
+        ctypes.c_double(tx_bw),
+        ctypes.c_int(tx_power),
+        filepath.encode('utf-8'),
+        channel.encode('utf-8'),
+        ctypes.c_double(bit_rate)
+    )
+    if result != 0:
+        raise RuntimeError(f"Transmission failed with code {result}")
+
+
+#####################################################################################
+# Persistent session
+
+class transmission:
+    """
+    Handle of a transmission queued on a radio_session\n
+    The C loop runs on the session thread without the GIL (ctypes releases it during the call)
+    and publishes its progress in a tx_control block, read here without any lock.
+    result() / done() behave like a concurrent.futures.Future, and the handle can be awaited in asyncio:
+    cancelling the awaiting task cancels the transmission.
+    """
+    def __init__(self, future: Future, control: tx_control):
+        self.future = future
+        self._control = control
+
+    @property
+    def bits_sent(self) -> int:
+        """Number of bits already on air"""
+        return self._control.bits_sent
+
+    @property
+    def total_bits(self) -> int:
+        """Length of the bitstream (0 until a bitstream file is loaded)"""
+        return self._control.total_bits
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the bitstream already sent"""
+        total = self._control.total_bits
+        return self._control.bits_sent / total if total else float(self.future.done())
+
+    def cancel(self) -> None:
+        """Stop the transmission (the current chunk / run is finished) or drop it if it has not started yet"""
+        self._control.cancel = 1
+        self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: float = None) -> None:
+        """Wait for the end of the transmission; raise CancelledError if it was cancelled, RuntimeError if it failed"""
+        return self.future.result(timeout)
+
+    async def _wait(self) -> None:
+        try:
+            return await asyncio.wrap_future(self.future)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def __await__(self):
+        return self._wait().__await__()
+
+
+class radio_session:
+    """
+    CaribouLite radio kept open between transmissions\n
+    The board is detected and initialized once, then any number of frames can be sent back-to-back.
+    The TX settings applied to the modem are cached: configure() (or the settings passed to transmit())
+    only reconfigures what changed. Only one session can be open at a time (the board is global).
+
+    Transmissions run in order on a single session thread: the *_async methods return a transmission handle
+    right away, so the next frame can be encoded while the current one is on air.
+
+        with radio_session(tx_freq=900e6) as radio:
+            for payload in payloads:
+                radio.transmit_iq_async(payload.bistream(), bit_rate=100e3)
+
+        await radio.transmit_iq_async(bits, bit_rate=100e3)  # from a coroutine
+
+    The same session can receive: start_receiving(), then read_samples() into preallocated arrays.
+    """
+    # setting -> (C setter, ctypes type)
+    _SETTERS = {"sample_rate": (_lib.radio_set_sample_rate, ctypes.c_double),
+                "tx_freq": (_lib.radio_set_frequency, ctypes.c_double),
+                "tx_bw": (_lib.radio_set_tx_bandwidth, ctypes.c_double),
+                "tx_power": (_lib.radio_set_tx_power, ctypes.c_int)}
+
+    def __init__(self, sample_rate=4e6, tx_freq=900e6, tx_bw=1e6, tx_power=0, channel="s1g"):
+        _check_tx_params(sample_rate, tx_freq, tx_bw, tx_power, channel)
+        self.channel = channel
+        self.actual_sample_rate = None # sample rate really used by the modem
+        self.rx_sample_rate = None # set by start_receiving()
+        self._settings = {} # settings currently applied to the modem (session thread)
+        self._requested = {} # settings of the last queued request (caller thread)
+        self._transmissions = []
+        self._streams = []
+        self._radio = _lib.radio_open(channel.encode('utf-8'))
+        if not self._radio:
+            raise RuntimeError("Failed to open the CaribouLite radio")
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="radio_session")
+        try:
+            self.configure(sample_rate=sample_rate, tx_freq=tx_freq, tx_bw=tx_bw, tx_power=tx_power)
+        except BaseException:
+            # The session is never returned: release the board and the session thread here
+            self.close()
+            raise
+
+    @property
+    def settings(self) -> dict:
+        """TX settings currently applied (sample_rate, tx_freq, tx_bw, tx_power)"""
+        return dict(self._settings)
+
+    def _handle(self):
+        if not self._radio:
+            raise RuntimeError("The radio session is closed")
+        return self._radio
+
+    ##### Transmission #####
+    def _request(self, settings: dict) -> dict:
+        """Validate a settings change against the last queued request and return the complete settings"""
+        requested = {name: self._requested.get(name) for name in self._SETTERS}
+        requested.update({name: value for name, value in settings.items() if value is not None})
+        _check_tx_params(**requested, channel=self.channel)
+        return requested
+
+    def _apply(self, requested: dict) -> None:
+        """Session thread: send the settings that changed to the modem"""
+        for name, value in requested.items():
+            if self._settings.get(name) == value:
+                continue
+            setter, c_type = self._SETTERS[name]
+            result = setter(self._radio, c_type(value))
+            if name == "sample_rate":
+                self.actual_sample_rate = result
+            elif result != 0:
+                raise RuntimeError(f"Setting {name} to {value} failed with code {result}")
+            self._settings[name] = value
+
+    def _send(self, send, args: tuple, requested: dict, control: tx_control) -> None:
+        """Session thread: apply the settings of the request, then run the C transmission loop"""
+        if control.cancel:
+            raise CancelledError("Transmission cancelled")
+        self._apply(requested)
+        result = send(self._radio, *args, ctypes.byref(control))
+        if result == TX_CANCELLED:
+            raise CancelledError("Transmission cancelled")
+        if result != 0:
+            raise RuntimeError(f"Transmission failed with code {result}")
+
+    def _submit(self, bitstream, nbits, bit_rate, settings: dict) -> transmission:
+        self._handle()
+        requested = self._request(settings)
+        control = tx_control()
+        if bit_rate is not None and not 0 < bit_rate <= requested["sample_rate"]:
+            raise ValueError("The bit rate must be positive and at most the samplerate (one sample per bit)")
+
+        if isinstance(bitstream, str):
+            send = _lib.radio_send_keyed if bit_rate is None else _lib.radio_send_iq
+            args = (bitstream.encode('utf-8'),)
+        else:
+            # 'data' shares the caller's memory and is kept alive by the job until the C loop is done
+            data, nbits = _packed_bits(bitstream, nbits)
+            control.total_bits = nbits
+            send = _lib.radio_send_keyed_bits if bit_rate is None else _lib.radio_send_iq_bits
+            args = (data.ctypes.data_as(ctypes.c_void_p), nbits)
+        if bit_rate is not None:
+            args += (ctypes.c_double(bit_rate),)
+
+        self._requested = requested
+        handle = transmission(self._pool.submit(self._send, send, args, requested, control), control)
+        self._transmissions = [t for t in self._transmissions if not t.done()] + [handle]
+        return handle
+
+    def configure(self, sample_rate=None, tx_freq=None, tx_bw=None, tx_power=None) -> None:
+        """
+        Change some TX settings, the ones left to None (or unchanged) are not sent to the modem again\n
+        The change is applied after the queued transmissions, this call waits for it.
+        """
+        self._handle()
+        requested = self._request({"sample_rate": sample_rate, "tx_freq": tx_freq, "tx_bw": tx_bw, "tx_power": tx_power})
+        self._requested = requested
+        self._pool.submit(self._apply, requested).result()
+
+    def transmit_async(self, bitstream, nbits=None, **settings) -> transmission:
+        """
+        Queue a bitstream to be sent by keying the CW and return its transmission handle right away\n
+        bitstream: path of a bitstream file (packed .bits or '0'/'1' .txt), a bit buffer,
+        or packed bytes-like / numpy data holding 'nbits' bits (all of them by default), passed without copy
+        (the buffer must not be modified before the end of the transmission).
+        settings: TX settings for this transmission, see configure().
+        """
+        return self._submit(bitstream, nbits, None, settings)
+
+    def transmit_iq_async(self, bitstream, bit_rate=100e3, nbits=None, **settings) -> transmission:
+        """Queue a bitstream (same inputs as transmit_async()) to be sent as IQ samples with sample-accurate timing"""
+        return self._submit(bitstream, nbits, bit_rate, settings)
+
+    def transmit(self, bitstream, nbits=None, **settings) -> None:
+        """Send a bitstream by keying the CW, like transmit(), and wait for the end of the transmission"""
+        _wait_transmission(self.transmit_async(bitstream, nbits, **settings))
+
+    def transmit_iq(self, bitstream, bit_rate=100e3, nbits=None, **settings) -> None:
+        """Send a bitstream as IQ samples with sample-accurate timing, like transmit_iq(), and wait for the end"""
+        _wait_transmission(self.transmit_iq_async(bitstream, bit_rate, nbits, **settings))
+
+    ##### Reception #####
+    def start_receiving(self, sample_rate=4e6, rx_bw=None, rx_gain=None, freq=None) -> float:
+        """
+        Switch the radio to reception, after the queued transmissions, and return the RX sample rate actually used\n
+        rx_bw: analog bandwidth in Hz (None keeps the current one), rx_gain: gain in dB (None for AGC),
+        freq: channel frequency in Hz (shared with TX, same as configure(tx_freq=freq)).
+        """
+        if not 0 < sample_rate <= 4e6:
+            raise ValueError("The samplerate must be positive, the maximum allowed by the cariboulite is 4MHz (4 000 000 Hz)")
+        if rx_gain is not None:
+            if not isinstance(rx_gain, numbers.Real) or isinstance(rx_gain, bool):
+                raise TypeError(f"The RX gain must be a number of dB or None (AGC), not {type(rx_gain).__name__}")
+            if not 0 <= rx_gain <= RX_GAIN_MAX_DB:
+                raise ValueError(f"The RX gain of the cariboulite goes from 0 to {RX_GAIN_MAX_DB} dB")
+        if freq is not None:
+            self.configure(tx_freq=freq)
+        job = self._pool.submit(_lib.radio_start_receiving, self._handle(), sample_rate, rx_bw or 0,
+                                rx_gain is None, 0 if rx_gain is None else int(round(rx_gain)))
+        self.rx_sample_rate = job.result()
+        return self.rx_sample_rate
+
+    def stop_receiving(self) -> None:
+        _lib.radio_stop_receiving(self._handle())
+
+    def read_samples(self, out: np.ndarray, meta: np.ndarray = None) -> int:
+        """
+        Read samples from the radio into a caller-owned array, in place (the GIL is released during the read)\n
+        out: complex64 array (I/Q scaled by 1/4096, like ReadSamples(std::complex<float>*)),
+        or int16 array of shape (n, 2) (native I/Q, like ReadSamples(std::complex<short>*)).
+        meta: optional uint8 array receiving the metadata byte (sync flag) of each sample.
+        Return the number of samples written at the start of 'out' (0 on timeout).
+        """
+        if out.dtype == np.complex64 and out.ndim == 1:
+            read, length = _lib.radio_read_samples_cf32, out.shape[0]
+        elif out.dtype == np.int16 and out.ndim == 2 and out.shape[1] == 2:
+            read, length = _lib.radio_read_samples_cs16, out.shape[0]
+        else:
+            raise TypeError("Samples are read into a complex64 array or an int16 array of shape (n, 2)")
+        if not (out.flags.c_contiguous and out.flags.writeable):
+            raise ValueError("The sample array must be C-contiguous and writeable")
+
+        meta_pointer = None
+        if meta is not None:
+            if meta.dtype != np.uint8 or meta.size < length or not (meta.flags.c_contiguous and meta.flags.writeable):
+                raise ValueError(f"The metadata array must be a writeable, contiguous uint8 array of at least {length} elements")
+            meta_pointer = meta.ctypes.data
+
+        result = read(self._handle(), out.ctypes.data, meta_pointer, length)
+        if result < 0:
+            raise RuntimeError(f"Reading samples failed with code {result}")
+        return result
+
+    def receive_stream(self, n_slots: int = 16, slot_samples: int = None, dtype=np.int16,
+                       timeout: float = 1.0) -> "rx_stream":
+        """Continuous reception into a ring of preallocated arrays, see rx_stream (call start_receiving() first)"""
+        stream = rx_stream(self, n_slots, slot_samples, dtype, timeout)
+        self._streams.append(stream)
+        return stream
+
+    ##### Lifetime #####
+    def cancel(self) -> None:
+        """Cancel the current transmission and every queued one"""
+        for handle in self._transmissions:
+            handle.cancel()
+        self._transmissions = []
+
+    def close(self) -> None:
+        """Wait for the queued transmissions, then stop the transmission and release the board"""
+        if self._radio:
+            self._pool.shutdown(wait=True)
+            for stream in self._streams:
+                stream.stop()
+            _lib.radio_close(self._radio)
+            self._radio = None
+
+    def __enter__(self) -> "radio_session":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+
+class rx_stream:
+    """
+    Continuous reception into a fixed ring of preallocated numpy slots\n
+    A C reader thread (like the one behind CaribouLiteRadio::StartReceiving) reads the radio chunk by chunk
+    straight into the slots, without the GIL. Iterating yields (samples, meta) views on the oldest filled slot:
+    nothing is copied, and a view stays valid until the next item is requested, when its slot is handed back
+    to the reader thread. When the consumer falls behind and the ring is full, the chunks read meanwhile
+    are dropped and counted in 'overruns'.
+
+        with radio.receive_stream(n_slots=32) as stream:
+            for samples, meta in stream:
+                detector.process(samples)
+
+    samples: int16 array of shape (n, 2) (native I/Q), or complex64 (scaled by 1/4096) when dtype=np.complex64.
+    slot_samples: samples per chunk, the native MTU by default.
+    timeout: seconds without any chunk after which the iteration raises TimeoutError.
+    """
+    def __init__(self, session: radio_session, n_slots: int = 16, slot_samples: int = None, dtype=np.int16,
+                 timeout: float = 1.0):
+        slot_samples = slot_samples or _lib.radio_mtu_samples(session._handle())
+        if np.dtype(dtype) == np.complex64:
+            self.samples = np.zeros((n_slots, slot_samples), dtype=np.complex64)
+        elif np.dtype(dtype) == np.int16:
+            self.samples = np.zeros((n_slots, slot_samples, 2), dtype=np.int16)
+        else:
+            raise TypeError("Samples are received as int16 (native I/Q) or complex64")
+        self.meta = np.zeros((n_slots, slot_samples), dtype=np.uint8)
+        self.lengths = np.zeros(n_slots, dtype=np.int32)
+        self.timeout = timeout
+        self._session = session
+        self._state = rx_ring_state()
+        self._stream = None
+        self._started = False
+        self._lock = threading.Lock() # stop() may be called from another thread than the consumer
+
+    @property
+    def chunks(self) -> int:
+        """Number of chunks received so far (dropped ones excluded)"""
+        return self._state.head
+
+    @property
+    def overruns(self) -> int:
+        """Number of chunks dropped because the consumer was behind"""
+        return self._state.overruns
+
+    @property
+    def errors(self) -> int:
+        """Number of failed reads"""
+        return self._state.errors
+
+    def start(self) -> None:
+        with self._lock:
+            if self._stream:
+                return
+            n_slots, slot_samples = self.samples.shape[:2]
+            self._stream = _lib.radio_stream_start(self._session._handle(), ctypes.byref(self._state),
+                                                   self.samples.ctypes.data, self.meta.ctypes.data,
+                                                   self.lengths.ctypes.data, n_slots, slot_samples,
+                                                   self.samples.dtype == np.complex64)
+            if not self._stream:
+                raise RuntimeError("Failed to start the reception stream")
+            self._started = True
+
+    def stop(self) -> None:
+        """
+        Stop the reader thread, the iteration ends once the chunks already received are consumed\n
+        Can be called from another thread while the stream is iterated.
+        """
+        with self._lock:
+            if self._stream:
+                _lib.radio_stream_stop(self._stream)
+                self._stream = None
+
+    def __iter__(self):
+        if not self._started:
+            raise RuntimeError("The stream is not started: call start() or use it in a with block")
+        n_slots = len(self.samples)
+        while True:
+            tail = self._state.tail
+            head = _lib.radio_stream_wait(ctypes.byref(self._state), int(self.timeout * 1000))
+            if head <= tail:
+                if not self._state.running: # stopped, and every chunk received is consumed
+                    return
+                raise TimeoutError(f"No samples received for {self.timeout} s")
+
+            slot = tail % n_slots
+            length = self.lengths[slot]
+            yield self.samples[slot, :length], self.meta[slot, :length]
+            # The views of this slot are no longer used: hand it back to the reader thread
+            _lib.radio_stream_release(ctypes.byref(self._state))
+
+    def __enter__(self) -> "rx_stream":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def _wait_transmission(handle: transmission) -> None:
+    """Wait for a transmission, cancelling it if the wait is interrupted (e.g. Ctrl+C)"""
+    try:
+        handle.result()
+    except BaseException:
+        handle.cancel()
+        raise
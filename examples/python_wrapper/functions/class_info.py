@@ -1,8 +1,15 @@
+from .bit_buffer import bit_buffer
 from .types_to_bin_func import *
 from .csv_management_func import *
 from .txt_management_func import *
 from .jason_management_func import *
 
+# Cycling prefix's head, RLE -> (1 1 1 1 1 2 1 3 1 4 1 5 2 10 2 20 2 50 2 100 2)
+CP_HEAD = bit_buffer.from_bitstring("10101001000100001000001100000000001100000000000000000000110000000000000000000000000000000000000000000000000011000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000011")
+
+# Cycling prefix's tail, RLE -> (30)
+CP_TAIL = bit_buffer.from_bitstring("111111111111111111111111111111")
+
 class payload_type:
     """
     Class used to create the payload to send via the Cariboulite SDR
@@ -35,48 +42,51 @@ class payload_type:
         self.text_report_path = text_report_path
         self.json_path = json_path
 
-    def bistream(self, cp: bool = True) -> str:
-        """Ecoding of the bitstream"""
-        bitstream_str = ""
-
+    def iter_frame(self, cp: bool = True):
+        """
+        Lazy encoding of the bitstream\n
+        Yield the frame as bit buffers (CP head, each type/length/payload section, CP tail).
+        The attached files are only read when their section is reached, and large files are
+        read in blocks, so the first bits are available before the whole payload is encoded.
+        """
         if cp:
             # Add the cycling prefix's head
-            # RLE -> (1 1 1 1 1 2 1 3 1 4 1 5 2 10 2 20 2 50 2 100 2)
-            bitstream_str += "10101001000100001000001100000000001100000000000000000000110000000000000000000000000000000000000000000000000011000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000011"
+            yield CP_HEAD
 
-        bitstream_str += encode_chunk(0, int_to_binary(self.version))
-        bitstream_str += encode_chunk(0, int_to_binary(self.direction))
-        bitstream_str += encode_chunk(0, int_to_binary(self.transmission_mode))
-        bitstream_str += encode_chunk(4, bool_to_bitstring(self.CRC_flag))
-        bitstream_str += encode_chunk(0, int_to_binary(self.transfer_ID))
-        bitstream_str += encode_chunk(0, int_to_binary(self.spacecraft_ID))
-        bitstream_str += encode_chunk(0, int_to_binary(self.groundstation_ID))
+        # Each section is encoded by the codec registered for its type id
+        yield from iter_section(0, self.version)
+        yield from iter_section(0, self.direction)
+        yield from iter_section(0, self.transmission_mode)
+        yield from iter_section(4, self.CRC_flag)
+        yield from iter_section(0, self.transfer_ID)
+        yield from iter_section(0, self.spacecraft_ID)
+        yield from iter_section(0, self.groundstation_ID)
 
         # Telemetry log bitstring
         if self.telemetry_log != None:
-            bitstream_str += encode_chunk(5, self.telemetry_log)
+            yield from iter_section(5, self.telemetry_log)
 
-        # Image bitstring
+        # Image bitstring (dimensions and color mode in the metadata block)
         if self.image_path != None:
-            bits, _, _, _ = image_to_bitstring(self.image_path, mode='L')
-            bitstream_str += encode_chunk(3, bits) # image bits
+            yield from iter_section(3, self.image_path)
 
-        # CSV's data bitstring
+        # CSV's data bitstring (header in the metadata block)
         if self.csv_path != None:
-            bitstream_str += encode_chunk(6, csv_to_bitstream(self.csv_path)[0])
+            yield from iter_section(6, self.csv_path)
 
         # Text report's bitstring
         if self.text_report_path != None:
-            bitstream_str += encode_chunk(7, file_to_bitstring(self.text_report_path))
+            yield from iter_section(7, self.text_report_path)
 
         if self.json_path != None:
-            bitstream_str += encode_chunk(8, json_file_to_bitstring(self.json_path))
+            yield from iter_section(8, self.json_path)
 
 
         if cp:
             # Add the cycling prefix's tail
-            # RLE -> (30)
-            bitstream_str += "111111111111111111111111111111"
-
-        return bitstream_str
+            yield CP_TAIL
 
+    def bistream(self, cp: bool = True) -> bit_buffer:
+        """Ecoding of the bitstream"""
+        # Single concatenation pass over the lazy frame
+        return bit_buffer.join(self.iter_frame(cp))
\ No newline at end of file
@@ -1,19 +1,16 @@
 import csv
+import numpy as np
 
-def create_csv(header: list, message: list[list], output_file: str) -> None:
-    """Function to create a CSV"""
-    data = []
-
-    # Add the header
-    data.append(header)
-
-    # Add the data
-    for message_ele in message:
-        data.append(message_ele)
+from .bit_buffer import bit_buffer, as_bit_buffer
 
+def create_csv(header: list, message, output_file: str) -> None:
+    """Function to create a CSV (message can be any iterable of rows, it is written as it is consumed)"""
     with open(output_file, "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerows(data)
+        # Add the header
+        writer.writerow(header)
+        # Add the data
+        writer.writerows(message)
 
 
 def read_csv(filepath: str) -> list[dict]:
@@ -63,11 +60,11 @@ def csv_to_bitstream(path: str) -> tuple[str, int]:
     return bitstream, len(full_str)
 
 
-def bitstream_to_csv(bitstream: str) -> list[dict]:
+def bitstream_to_csv(bitstream: bit_buffer | str) -> list[dict]:
     """Decode a UTF-8 bitstream back to CSV-style list of dicts."""
-    # Convert bits back to bytes
-    byte_array = bytes(int(bitstream[i:i+8], 2) for i in range(0, len(bitstream), 8))
-    text = byte_array.decode('utf-8')
+    # Packed bytes, no copy
+    byte_array = as_bit_buffer(bitstream).memview()
+    text = str(byte_array, 'utf-8')
 
     # Split rows and fields
     rows = text.split(';')
@@ -77,6 +74,294 @@ def bitstream_to_csv(bitstream: str) -> list[dict]:
         decoded.append(fields)
     return decoded
 
+##### Columnar binary codec #####
+"""
+The housekeeping logs are sent column by column in binary instead of UTF-8 text:
+
+- timestamp: milliseconds, first value in the schema then one delta per row
+- float32 / float64: IEEE 754
+- int: smallest signed integer type holding the column
+- enum: one code per row, the categories are in the schema (e.g. Mode, ADCS_Mode)
+- str: fallback, 32-bit length per row + UTF-8 bytes
+
+Rows are processed in blocks of 'block_rows' rows (every column of a block, then the next block),
+so a log never has to be loaded at once. All numbers are big-endian.
+"""
+
+# Known columns of the housekeeping CSV, the other columns are inferred
+HOUSEKEEPING_SCHEMA = {"Timestamp": "timestamp",
+                       "Bus_Voltage_V": "float32",
+                       "Bus_Current_A": "float32",
+                       "Battery_Temp_C": "float32",
+                       "OBDH_Temp_C": "float32",
+                       "Panel_Temp_C": "float32",
+                       "Mode": "enum",
+                       "ADCS_Mode": "enum",
+                       "ReactionWheel_Speed_rpm": "int",
+                       "Sun_Vector_X": "float32",
+                       "Sun_Vector_Y": "float32",
+                       "Sun_Vector_Z": "float32"}
+
+# Inferred types are tried in this order, they must give back the exact same text
+_INFERRED_TYPES = ("int", "timestamp", "float32", "float64", "enum", "str")
+_MAX_CATEGORIES = 255
+
+
+def read_csv_header(path: str) -> list[str]:
+    """Return the header row of a CSV file."""
+    with open(path, "r", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def iter_csv_blocks(path: str, block_rows: int = 4096):
+    """Streaming row reader: yield the CSV content (header excluded) as blocks of columns (lists of str)."""
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        width = len(next(reader, []))
+        block = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                raise ValueError(f"{path} line {reader.line_num}: {len(row)} fields, the header has {width}.")
+            block.append(row)
+            if len(block) == block_rows:
+                yield [list(col) for col in zip(*block)]
+                block = []
+        if block:
+            yield [list(col) for col in zip(*block)]
+
+
+def _min_int_dtype(low: int, high: int) -> str:
+    """Smallest big-endian signed integer dtype holding [low, high]."""
+    for dtype in (">i1", ">i2", ">i4"):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return ">i8"
+
+
+def _naive_timestamps(values: np.ndarray, suffix: str) -> bool:
+    """
+    True if every value has the column suffix ('Z' or none) and no UTC offset\n
+    numpy converts "+01:00" / "-05:00" offsets to UTC, the original text could not be restored.
+    """
+    if not np.array_equal(np.char.endswith(values, "Z"), np.full(values.shape, suffix == "Z")):
+        return False
+    # '+' anywhere, or a '-' after the date part (YYYY-MM-DD), is an offset
+    return not ((np.char.find(values, "+") >= 0) | (np.char.rfind(values, "-") > 7)).any()
+
+
+def _parse_timestamps(values: np.ndarray, suffix: str) -> np.ndarray:
+    """Parse ISO 8601 timestamps into int64 milliseconds."""
+    if suffix:
+        values = np.char.rstrip(values, suffix)
+    return np.array(values, dtype="datetime64[ms]").astype(np.int64)
+
+
+def _format_timestamps(ms: np.ndarray, suffix: str) -> np.ndarray:
+    return np.char.add(np.datetime_as_string(ms.astype("datetime64[ms]"), unit="ms"), suffix)
+
+
+class _column_stats:
+    """Statistics gathered on a column during the schema pass"""
+    def __init__(self, name: str, forced: str = None):
+        self.name = name
+        self.candidates = [forced] if forced else list(_INFERRED_TYPES)
+        self.forced = forced is not None
+        self.int_range = None
+        self.categories = set()
+        self.suffix = None
+        self.t0 = None
+        self.t_last = None
+        self.delta_range = (0, 0)
+        self.str_bytes = 0
+        self.seen_bytes = 0 # UTF-8 size of the values already seen, for a forced column falling back to str
+
+    def _drop(self, col_type: str) -> None:
+        if self.forced:
+            # A value the schema type cannot hold (blank cell, overflow, ...): the column is sent as text
+            self.candidates = ["str"]
+            self.str_bytes = self.seen_bytes
+            return
+        self.candidates.remove(col_type)
+
+    def update(self, col: list[str]) -> None:
+        values = np.array(col, dtype=str)
+        col_bytes = len("".join(col).encode("utf-8"))
+
+        if "int" in self.candidates:
+            try:
+                ints = values.astype(np.int64)
+                if not self.forced and not np.array_equal(ints.astype(str), values):
+                    raise ValueError
+                low, high = int(ints.min()), int(ints.max())
+                if self.int_range:
+                    low, high = min(low, self.int_range[0]), max(high, self.int_range[1])
+                self.int_range = (low, high)
+            except (ValueError, OverflowError):
+                self._drop("int")
+
+        if "timestamp" in self.candidates:
+            try:
+                if self.suffix is None:
+                    self.suffix = "Z" if col[0].endswith("Z") else ""
+                if not _naive_timestamps(values, self.suffix):
+                    raise ValueError
+                ms = _parse_timestamps(values, self.suffix)
+                if np.isnat(ms.astype("datetime64[ms]")).any():
+                    raise ValueError
+                if not self.forced and not np.array_equal(_format_timestamps(ms, self.suffix), values):
+                    raise ValueError
+                if self.t0 is None:
+                    self.t0 = self.t_last = int(ms[0])
+                deltas = np.diff(ms, prepend=self.t_last)
+                self.t_last = int(ms[-1])
+                self.delta_range = (min(self.delta_range[0], int(deltas.min())),
+                                    max(self.delta_range[1], int(deltas.max())))
+            except (ValueError, OverflowError):
+                self._drop("timestamp")
+
+        for col_type, dtype in (("float32", np.float32), ("float64", np.float64)):
+            if col_type in self.candidates:
+                try:
+                    floats = values.astype(np.float64).astype(dtype)
+                    if not self.forced and not np.array_equal(floats.astype(str), values):
+                        raise ValueError
+                except (ValueError, OverflowError):
+                    self._drop(col_type)
+
+        if "enum" in self.candidates:
+            self.categories.update(np.unique(values).tolist())
+            if len(self.categories) > _MAX_CATEGORIES:
+                self._drop("enum")
+
+        self.seen_bytes += col_bytes
+        if "str" in self.candidates:
+            self.str_bytes += col_bytes
+
+    def describe(self) -> dict:
+        """Column description stored in the schema (metadata block)."""
+        col_type = self.candidates[0]
+        if col_type == "int":
+            return {"type": "int", "dtype": _min_int_dtype(*(self.int_range or (0, 0)))}
+        if col_type == "timestamp":
+            return {"type": "timestamp", "dtype": _min_int_dtype(*self.delta_range),
+                    "t0": self.t0 or 0, "suffix": self.suffix or ""}
+        if col_type in ("float32", "float64"):
+            return {"type": col_type, "dtype": ">f4" if col_type == "float32" else ">f8"}
+        if col_type == "enum":
+            return {"type": "enum", "dtype": "u1", "categories": sorted(self.categories)}
+        return {"type": "str", "nbytes": self.str_bytes}
+
+
+def csv_schema(path: str, schema: dict = HOUSEKEEPING_SCHEMA, block_rows: int = 4096) -> dict:
+    """
+    Schema pass: stream the CSV once and choose the binary type of every column\n
+    Columns listed in 'schema' get the given type, the others are inferred.
+    A listed column holding a value its type cannot represent (e.g. a blank cell or a timestamp with a UTC offset) is sent as text.
+    """
+    header = read_csv_header(path)
+    stats = [_column_stats(name, (schema or {}).get(name)) for name in header]
+
+    n_rows = 0
+    for block in iter_csv_blocks(path, block_rows):
+        n_rows += len(block[0])
+        for col_stats, col in zip(stats, block):
+            col_stats.update(col)
+
+    return {"header": header,
+            "rows": n_rows,
+            "block_rows": block_rows,
+            "columns": [col_stats.describe() for col_stats in stats]}
+
+
+def _columnar_nbits(meta: dict) -> int:
+    """Length in bits of the binary columns described by 'meta'."""
+    nbytes = 0
+    for column in meta["columns"]:
+        if column["type"] == "str":
+            nbytes += 4 * meta["rows"] + column["nbytes"]
+        else:
+            nbytes += np.dtype(column["dtype"]).itemsize * meta["rows"]
+    return nbytes * 8
+
+
+def _encode_columns(path: str, meta: dict):
+    """Yield one bit buffer per column and per block of rows."""
+    t_last = [column.get("t0") for column in meta["columns"]]
+    for block in iter_csv_blocks(path, meta["block_rows"]):
+        for i, (column, col) in enumerate(zip(meta["columns"], block)):
+            values = np.array(col, dtype=str)
+            col_type = column["type"]
+
+            if col_type == "str":
+                encoded = [v.encode("utf-8") for v in col]
+                lengths = np.array([len(v) for v in encoded], dtype=">u4")
+                raw = lengths.tobytes() + b"".join(encoded)
+            elif col_type == "enum":
+                uniques, inverse = np.unique(values, return_inverse=True)
+                index = {name: code for code, name in enumerate(column["categories"])}
+                codes = np.array([index[name] for name in uniques.tolist()], dtype=column["dtype"])
+                raw = codes[inverse].tobytes()
+            elif col_type == "timestamp":
+                ms = _parse_timestamps(values, column["suffix"])
+                raw = np.diff(ms, prepend=t_last[i]).astype(column["dtype"]).tobytes()
+                t_last[i] = int(ms[-1])
+            elif col_type == "int":
+                raw = values.astype(np.int64).astype(column["dtype"]).tobytes()
+            else: # float32 / float64
+                raw = values.astype(np.float64).astype(column["dtype"]).tobytes()
+
+            yield bit_buffer.from_bytes(raw)
+
+
+def csv_to_columnar(path: str, schema: dict = HOUSEKEEPING_SCHEMA, block_rows: int = 4096) -> tuple[dict, int, object]:
+    """
+    Encode a CSV with the columnar binary codec\n
+    Return (meta, nbits, pieces): the schema to carry in the frame, the payload length in bits
+    and a generator encoding the payload block by block.
+    """
+    meta = csv_schema(path, schema, block_rows)
+    return meta, _columnar_nbits(meta), _encode_columns(path, meta)
+
+
+def iter_columnar_rows(payload: bit_buffer, meta: dict):
+    """Decode a columnar payload back to CSV rows (lists of str), one block of rows at a time."""
+    raw = as_bit_buffer(payload).memview()
+    offset = 0
+    t_last = [column.get("t0") for column in meta["columns"]]
+    for first in range(0, meta["rows"], meta["block_rows"]):
+        n = min(meta["block_rows"], meta["rows"] - first)
+        columns = []
+        for i, column in enumerate(meta["columns"]):
+            col_type = column["type"]
+
+            if col_type == "str":
+                lengths = np.frombuffer(raw, dtype=">u4", count=n, offset=offset)
+                offset += 4 * n
+                ends = offset + np.cumsum(lengths)
+                starts = ends - lengths
+                columns.append([str(raw[a:b], "utf-8") for a, b in zip(starts.tolist(), ends.tolist())])
+                offset = int(ends[-1])
+                continue
+
+            dtype = np.dtype(column["dtype"])
+            values = np.frombuffer(raw, dtype=dtype, count=n, offset=offset)
+            offset += dtype.itemsize * n
+
+            if col_type == "enum":
+                columns.append(np.array(column["categories"], dtype=str)[values].tolist())
+            elif col_type == "timestamp":
+                ms = t_last[i] + np.cumsum(values.astype(np.int64))
+                t_last[i] = int(ms[-1])
+                columns.append(_format_timestamps(ms, column["suffix"]).tolist())
+            else: # int / float32 / float64, shortest text giving back the same value
+                columns.append(values.astype(dtype.newbyteorder("=")).astype(str).tolist())
+
+        yield from zip(*columns)
+
+
 ####################################################
 
 # Encode to bitstream
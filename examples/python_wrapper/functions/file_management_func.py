@@ -0,0 +1,43 @@
+import os
+import numpy as np
+
+from .bit_buffer import bit_buffer, as_bit_buffer
+
+"""
+Byte-level file codecs shared by the txt, json and bin file types.
+
+Files are memory-mapped and handed to the framing layer as packed bit buffers,
+so no per-byte conversion happens and the content is only read from disk when it is used.
+"""
+
+def map_file(path: str) -> np.ndarray:
+    """Memory-map a file as a read-only uint8 array (empty files cannot be mapped)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def file_to_bitstring(path: str) -> bit_buffer:
+    """Read any file and return its content as a bit buffer (zero-copy view on the mapped file)."""
+    return bit_buffer(map_file(path))
+
+
+def file_to_bit_chunks(path: str, chunk_size: int = 1 << 20):
+    """Yield the content of any file as bit buffers of at most 'chunk_size' bytes (views on the mapped file)."""
+    data = map_file(path)
+    for offset in range(0, data.size, chunk_size):
+        yield bit_buffer(data[offset:offset + chunk_size])
+
+
+def bitstring_to_file(bitstring: bit_buffer | str, output_path: str, whole_bytes: bool = False) -> None:
+    """
+    Recreate a file from a bit buffer (or a bit string of '0'/'1')\n
+    The last byte is zero padded, unless 'whole_bytes' is set, in which case a length
+    that is not a multiple of 8 bits is an error.
+    """
+    bits = as_bit_buffer(bitstring)
+    if whole_bytes and len(bits) % 8 != 0:
+        raise ValueError("Bitstring length must be divisible by 8")
+
+    with open(output_path, "wb") as f:
+        f.write(bits.memview())
@@ -1,34 +1,18 @@
-def json_file_to_bitstring(json_path: str) -> str:
+from .bit_buffer import bit_buffer
+from .file_management_func import file_to_bitstring, bitstring_to_file
+
+def json_file_to_bitstring(json_path: str) -> bit_buffer:
     """
-    Function that reads a json file and transforms it into a bitstring
+    Function that reads a json file and transforms it into a bit buffer
     """
-    # Read the file as raw bytes
-    with open(json_path, "rb") as f:
-        data = f.read()
-
-    # Convert each byte to 8-bit binary and concatenate
-    bitstring = ''.join(f"{byte:08b}" for byte in data)
-    return bitstring
+    return file_to_bitstring(json_path)
 
-def bitstring_to_json_file(bitstring: str, output_path: str) -> None:
+def bitstring_to_json_file(bitstring: bit_buffer | str, output_path: str) -> None:
     """
-    Function that takes a bitsring and creates a json file
+    Function that takes a bit buffer (or a bitsring) and creates a json file
     """
     # Ensure bitstring length is a multiple of 8
-    if len(bitstring) % 8 != 0:
-        raise ValueError("Bitstring length must be divisible by 8")
-
-    # Convert binary → bytes
-    byte_list = [
-        int(bitstring[i:i+8], 2)
-        for i in range(0, len(bitstring), 8)
-    ]
-
-    data = bytes(byte_list)
-
-    # Write the JSON file back
-    with open(output_path, "wb") as f:
-        f.write(data)
+    bitstring_to_file(bitstring, output_path, whole_bytes=True)
 
 """
 Use example:
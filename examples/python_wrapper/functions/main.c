@@ -6,11 +6,12 @@
 #include <unistd.h>
 #include <stdbool.h>
 #include <string.h>
+#include <pthread.h>
 #include <cariboulite.h>
 
 
 // Make sure you build the C tool with this command:
-// gcc -shared -fPIC -o libcariboulite_radio.so main.c -lcariboulite -lm
+// gcc -shared -fPIC -o libcariboulite_radio.so main.c -lcariboulite -lm -lpthread
 
 
 // Main parameters
@@ -18,6 +19,41 @@
 #define SINGLE_FACTOR  2.1  // Multiplication factor when single "0" or "1" are broadcasted
 #define MULTIPLE_FACTOR 2.5 // Multiplication factor when consecutive "0" or "1" are broadcasted
 
+// IQ mode parameters (transmit_iq)
+#define OOK_AMPLITUDE 4095  // I level of an "on" sample (CS16, 4096 = full scale); "off" samples are 0
+#define WRITE_RETRIES 10    // Number of successive write timeouts tolerated before giving up
+#define READ_ERROR_BACKOFF_US 1000 // Pause of the RX reader thread after a failed read (no busy loop on a dead radio)
+
+// Packed bitstream files: "OOKB" | bit count (uint64, big-endian) | bits packed MSB-first
+// (same layout as write_bitstream_file() in binfile_management_func.py)
+#define BITSTREAM_MAGIC "OOKB"
+#define BITSTREAM_HEADER_SIZE 12
+#define BIT_AT(bits, i) (((bits)[(i) >> 3] >> (7 - ((i) & 7))) & 1)
+
+// Transmission control block, shared with the Python thread while the TX loop runs (tx_control in cariboulite_radio.py)
+// Accessed with atomic loads / stores only: no lock is taken on either side
+typedef struct {
+    long bits_sent;  // progress, written by the TX loop
+    long total_bits; // written when the bitstream is loaded
+    int cancel;      // set by the caller to stop the transmission
+} tx_control;
+#define TX_CANCELLED 1 // return code of a cancelled transmission
+
+static void report_total(tx_control* control, long total_bits)
+{
+    if (control) __atomic_store_n(&control->total_bits, total_bits, __ATOMIC_RELAXED);
+}
+
+static void report_progress(tx_control* control, long bits_sent)
+{
+    if (control) __atomic_store_n(&control->bits_sent, bits_sent, __ATOMIC_RELAXED);
+}
+
+static bool cancel_requested(tx_control* control)
+{
+    return control && __atomic_load_n(&control->cancel, __ATOMIC_RELAXED);
+}
+
 // Function that starts the transmission of a CW (radio = on)
 void start_tx(cariboulite_radio_state_st* radio)
 {
@@ -35,120 +71,544 @@ void stop_tx(cariboulite_radio_state_st* radio)
     cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_tx, true); // Activate TX channel
 }
 
-// Main transmit function
-// Exposed function for Python
-int transmit(double sample_rate, double tx_freq, double tx_bw, int tx_power, const char* filepath, const char* channel)
+// Function that switches the TX channel to IQ samples: the modem sends whatever is written with cariboulite_radio_write_samples
+void start_iq_tx(cariboulite_radio_state_st* radio)
 {
-    /*
-    The main inputs are:
-    - Samplerate
-    - Transmission Frequency
-    - Transmission Bandwidth
-    - Transmission Power
-    - Path to the .txt containing the bitstring to broadcast
-    - Choice of channel: "s1g" -> low freq channel
-                         "hif" -> high freq channel
-    */
+    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_rx, false); // Deactivate RX channel
+    cariboulite_radio_set_cw_outputs(radio, false, false); // No CW -> IQ samples
+    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_tx, true); // Activate TX channel
+}
 
-    // [1 - Detect and initialize the Cariboulite board]
+// Load a bitstream file: packed format (see BITSTREAM_MAGIC), or '0'/'1' characters (anything else is ignored)
+// Return a malloc'ed array of packed bits (MSB-first), NULL on failure
+static uint8_t* load_bitstream(const char* filepath, long* bitcount)
+{
+    FILE *fp = fopen(filepath, "rb");
+    if (!fp) {
+        perror("Cannot open bitstream file");
+        return NULL;
+    }
+
+    // Memory allocation
+    fseek(fp, 0, SEEK_END);
+    long fsize = ftell(fp);
+    rewind(fp);
+
+    uint8_t header[BITSTREAM_HEADER_SIZE];
+    bool packed = fsize >= BITSTREAM_HEADER_SIZE
+                  && fread(header, 1, BITSTREAM_HEADER_SIZE, fp) == BITSTREAM_HEADER_SIZE
+                  && memcmp(header, BITSTREAM_MAGIC, 4) == 0;
+
+    long nbytes = fsize;
+    if (packed) {
+        uint64_t nbits = 0;
+        for (int k = 4; k < BITSTREAM_HEADER_SIZE; k++) nbits = (nbits << 8) | header[k];
+        nbytes = (nbits + 7) / 8;
+        if (nbytes > fsize - BITSTREAM_HEADER_SIZE) {
+            printf("Truncated bitstream file\n");
+            fclose(fp);
+            return NULL;
+        }
+        *bitcount = nbits;
+    } else {
+        rewind(fp);
+        nbytes = (fsize + 7) / 8;
+    }
+
+    uint8_t *bits = calloc(nbytes > 0 ? nbytes : 1, 1);
+    if (!bits) {
+        printf("Memory allocation failed\n");
+        fclose(fp);
+        return NULL;
+    }
+
+    if (packed) {
+        if (fread(bits, 1, nbytes, fp) != (size_t)nbytes) {
+            perror("Cannot read bitstream file");
+            free(bits);
+            bits = NULL;
+        }
+    } else {
+        // Legacy text format: pack the characters on the fly
+        *bitcount = 0;
+        for (int c = fgetc(fp); c != EOF; c = fgetc(fp)) {
+            if (c != '0' && c != '1') continue;
+            if (c == '1') bits[*bitcount >> 3] |= 0x80 >> (*bitcount & 7);
+            (*bitcount)++;
+        }
+    }
+    fclose(fp);
+    return bits;
+}
+
+// Stop the transmission, the board stays initialized
+static void stop_radio(cariboulite_radio_state_st* radio)
+{
+    // Equivalent to the real "stop_tx" function in the official C++ API
+    cariboulite_radio_set_cw_outputs(radio, false, false);
+    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_tx, false);
+}
+
+// Write a whole buffer of samples, the driver may accept less than asked per call
+// Return 0 on success, -1 on error or after WRITE_RETRIES successive timeouts
+static int write_all_samples(cariboulite_radio_state_st* radio, cariboulite_sample_complex_int16* buffer, size_t length)
+{
+    int timeouts = 0;
+    while (length > 0) {
+        int ret = cariboulite_radio_write_samples(radio, buffer, length);
+        if (ret < 0) {
+            printf("Writing samples failed (%d).\n", ret);
+            return -1;
+        }
+        if (ret == 0) {
+            if (++timeouts >= WRITE_RETRIES) {
+                printf("Writing samples timed out.\n");
+                return -1;
+            }
+            continue;
+        }
+        timeouts = 0;
+        buffer += ret;
+        length -= ret;
+    }
+    return 0;
+}
+
+// Synthesize the OOK envelope of a bitstream as IQ samples and stream it, one native chunk (MTU) at a time
+// Bit i covers the samples [round(i * samples_per_bit), round((i + 1) * samples_per_bit)),
+// so a fractional number of samples per bit does not drift over the frame
+// The progress is reported and the cancel flag checked once per chunk
+static int stream_ook_samples(cariboulite_radio_state_st* radio, const uint8_t* bits, long bitcount, double samples_per_bit,
+                              tx_control* control)
+{
+    size_t mtu = cariboulite_radio_get_native_mtu_size_samples(radio);
+    if (mtu == 0) mtu = 1 << 14;
+
+    cariboulite_sample_complex_int16 *chunk = malloc(mtu * sizeof(cariboulite_sample_complex_int16));
+    if (!chunk) {
+        printf("Memory allocation failed\n");
+        return -1;
+    }
+
+    size_t filled = 0;
+    long long bit_end = 0;
+    for (long i = 0; i < bitcount; i++) {
+        long long bit_start = bit_end;
+        bit_end = llround((i + 1) * samples_per_bit);
+        int16_t level = BIT_AT(bits, i) ? OOK_AMPLITUDE : 0;
+
+        for (long long n = bit_start; n < bit_end; n++) {
+            chunk[filled].i = level;
+            chunk[filled].q = 0;
+            if (++filled == mtu) {
+                if (cancel_requested(control)) {
+                    free(chunk);
+                    return TX_CANCELLED;
+                }
+                if (write_all_samples(radio, chunk, filled) != 0) {
+                    free(chunk);
+                    return -1;
+                }
+                filled = 0;
+                report_progress(control, (n + 1 == bit_end) ? i + 1 : i); // bits entirely written
+            }
+        }
+    }
+
+    int ret = (filled > 0) ? write_all_samples(radio, chunk, filled) : 0;
+    if (ret == 0) report_progress(control, bitcount);
+    free(chunk);
+    return ret;
+}
+
+
+// Session functions
+// Exposed functions for Python: the board is initialized once by radio_open(),
+// then configured and used for any number of transmissions until radio_close()
+
+// Detect and initialize the Cariboulite board, then return the radio of the chosen channel ("s1g" or "hif")
+// Return NULL (board closed) on failure
+cariboulite_radio_state_st* radio_open(const char* channel)
+{
     cariboulite_version_en hw_ver;
     char hw_name[128], hw_uuid[128];
 
     if (!cariboulite_detect_connected_board(&hw_ver, hw_name, hw_uuid)) {
         printf("No board detected.\n");
-        return -1;
+        return NULL;
     }
 
     if (cariboulite_init(false, cariboulite_log_level_none) != 0) {
         printf("Failed to initialize CaribouLite.\n");
-        return -1;
+        return NULL;
     }
 
     // Setting chosen TX channel
-    cariboulite_radio_state_st* radio = cariboulite_get_radio(cariboulite_channel_s1g);
-
+    cariboulite_radio_state_st* radio = NULL;
     if (strcmp(channel, "s1g") == 0) {
-	cariboulite_radio_state_st* radio = cariboulite_get_radio(cariboulite_channel_s1g);
-        if (!radio) {
-            printf("Failed to get S1G radio.\n");
-            cariboulite_close();
-            return -1;
-        }
+        radio = cariboulite_get_radio(cariboulite_channel_s1g);
+        if (!radio) printf("Failed to get S1G radio.\n");
     } else if (strcmp(channel, "hif") == 0) {
-	cariboulite_radio_state_st* radio = cariboulite_get_radio(cariboulite_channel_hif);
-        if (!radio) {
-            printf("Failed to get HIF radio.\n");
-            cariboulite_close();
-            return -1;
-        }
+        radio = cariboulite_get_radio(cariboulite_channel_hif);
+        if (!radio) printf("Failed to get HIF radio.\n");
+    } else {
+        printf("Unknown channel \"%s\".\n", channel);
     }
 
+    if (!radio) cariboulite_close();
+    return radio;
+}
 
-    // [2 - Setting the TX parameters]
+int radio_set_frequency(cariboulite_radio_state_st* radio, double tx_freq)
+{
     double freq = tx_freq;
-    cariboulite_radio_set_frequency(radio, true, &freq);
-    cariboulite_radio_set_tx_power(radio, tx_power);
-    cariboulite_radio_set_tx_bandwidth(radio, tx_bw);
+    return cariboulite_radio_set_frequency(radio, true, &freq);
+}
+
+int radio_set_tx_power(cariboulite_radio_state_st* radio, int tx_power)
+{
+    return cariboulite_radio_set_tx_power(radio, tx_power);
+}
+
+int radio_set_tx_bandwidth(cariboulite_radio_state_st* radio, double tx_bw)
+{
+    return cariboulite_radio_set_tx_bandwidth_flt(radio, tx_bw);
+}
+
+// The modem only supports a few sample rates: return the one actually set
+double radio_set_sample_rate(cariboulite_radio_state_st* radio, double sample_rate)
+{
+    float actual_rate = (float)sample_rate;
     cariboulite_radio_set_tx_samp_cutoff_flt(radio, sample_rate);
+    cariboulite_radio_get_tx_samp_cutoff_flt(radio, &actual_rate);
+    return actual_rate;
+}
 
-    // [3 - Loading bitstring from .txt file]
-    FILE *fp = fopen(filepath, "r");
-    if (!fp) {
-        perror("Cannot open bitstream file");
-        cariboulite_close();
-        return -1;
+// Broadcast packed bits (MSB-first) by keying the CW (timing given by usleep)
+// control (nullable): progress and cancellation, checked once per run
+int radio_send_keyed_bits(cariboulite_radio_state_st* radio, const uint8_t* bits, long bitcount, tx_control* control)
+{
+    report_total(control, bitcount);
+
+    // Broadcasting the OOK-encoded binary data, one run of identical bits at a time (run length encoding)
+    // The broadcasted message should start with a binary value = 1 -> "on"
+    long i = 0;
+    while (i < bitcount) {
+        if (cancel_requested(control)) {
+            stop_radio(radio);
+            return TX_CANCELLED;
+        }
+
+        uint8_t current = BIT_AT(bits, i);
+        long run_len = 1;
+        while (i + run_len < bitcount && BIT_AT(bits, i + run_len) == current) run_len++;
+
+        if (current == 1) start_tx(radio); // if binary val == 1 -> "on"
+        else stop_tx(radio); // if binary val == 0 -> "off"
+
+        // For timing and sychronization purposes, increasing the TX delays by constant values
+        double factor = (run_len > 1) ? MULTIPLE_FACTOR : SINGLE_FACTOR;
+        usleep(run_len * DEFAULT_BIT_US * factor);
+        i += run_len;
+        report_progress(control, i);
     }
 
-    // Memory allocation
-    fseek(fp, 0, SEEK_END);
-    long fsize = ftell(fp);
-    rewind(fp);
+    stop_radio(radio);
+    return 0;
+}
 
-    uint8_t *bitstream = malloc(fsize);
-    if (!bitstream) {
-        printf("Memory allocation failed\n");
-        fclose(fp);
-        cariboulite_close();
+// Broadcast packed bits (MSB-first) by streaming their OOK envelope as IQ samples
+// Every bit lasts exactly sample_rate / bit_rate samples (sample rate actually set on the modem)
+// control (nullable): progress and cancellation, checked once per native chunk of samples
+int radio_send_iq_bits(cariboulite_radio_state_st* radio, const uint8_t* bits, long bitcount, double bit_rate,
+                       tx_control* control)
+{
+    report_total(control, bitcount);
+
+    float sample_rate = 0;
+    cariboulite_radio_get_tx_samp_cutoff_flt(radio, &sample_rate);
+    double samples_per_bit = sample_rate / bit_rate;
+    if (bit_rate <= 0 || samples_per_bit < 1.0) {
+        printf("Bit rate too high for a %.0f Hz sample rate.\n", sample_rate);
         return -1;
     }
 
+    if (cancel_requested(control)) return TX_CANCELLED;
+
+    start_iq_tx(radio);
+    int ret = stream_ook_samples(radio, bits, bitcount, samples_per_bit, control);
+    stop_radio(radio);
+    return ret;
+}
+
+// Broadcast a bitstream file (packed or '0'/'1' text) by keying the CW
+int radio_send_keyed(cariboulite_radio_state_st* radio, const char* filepath, tx_control* control)
+{
+    long bitcount = 0;
+    uint8_t *bits = load_bitstream(filepath, &bitcount);
+    if (!bits) return -1;
+
+    int ret = radio_send_keyed_bits(radio, bits, bitcount, control);
+    free(bits);
+    return ret;
+}
+
+// Broadcast a bitstream file (packed or '0'/'1' text) as IQ samples
+int radio_send_iq(cariboulite_radio_state_st* radio, const char* filepath, double bit_rate, tx_control* control)
+{
     long bitcount = 0;
-    for (int c = fgetc(fp); c != EOF; c = fgetc(fp)) {
-        if (c == '0') bitstream[bitcount++] = 0;
-        else if (c == '1') bitstream[bitcount++] = 1;
+    uint8_t *bits = load_bitstream(filepath, &bitcount);
+    if (!bits) return -1;
+
+    int ret = radio_send_iq_bits(radio, bits, bitcount, bit_rate, control);
+    free(bits);
+    return ret;
+}
+
+// Switch the radio to reception: sample rate, analog bandwidth (ignored when <= 0) and gain (AGC when agc != 0)
+// Return the RX sample rate actually set on the modem
+double radio_start_receiving(cariboulite_radio_state_st* radio, double sample_rate, double rx_bw, int agc, int rx_gain_db)
+{
+    stop_radio(radio);
+    cariboulite_radio_set_rx_sample_rate_flt(radio, sample_rate);
+    if (rx_bw > 0) cariboulite_radio_set_rx_bandwidth_flt(radio, rx_bw);
+    cariboulite_radio_set_rx_gain_control(radio, agc != 0, rx_gain_db);
+    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_rx, true);
+
+    float actual_rate = (float)sample_rate;
+    cariboulite_radio_get_rx_sample_rate_flt(radio, &actual_rate);
+    return actual_rate;
+}
+
+void radio_stop_receiving(cariboulite_radio_state_st* radio)
+{
+    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_rx, false);
+}
+
+// Read up to 'length' native samples (I/Q int16 pairs, like CaribouLiteRadio::ReadSamples(std::complex<short>*))
+// straight into the caller's buffer, metadata (one byte per sample) is nullable
+// Return the number of samples read, 0 on timeout, < 0 on error
+int radio_read_samples_cs16(cariboulite_radio_state_st* radio, cariboulite_sample_complex_int16* samples, uint8_t* meta, size_t length)
+{
+    return cariboulite_radio_read_samples(radio, samples, (cariboulite_sample_meta*)meta, length);
+}
+
+// Read up to 'length' samples as interleaved float I/Q, scaled by 1/4096 like CaribouLiteRadio::ReadSamples(std::complex<float>*)
+// The native samples are read into the first half of the caller's buffer and widened in place,
+// from the last sample to the first (sample i is written over the native samples 2i and 2i+1, already converted)
+int radio_read_samples_cf32(cariboulite_radio_state_st* radio, float* samples, uint8_t* meta, size_t length)
+{
+    cariboulite_sample_complex_int16* native = (cariboulite_sample_complex_int16*)samples;
+    int ret = cariboulite_radio_read_samples(radio, native, (cariboulite_sample_meta*)meta, length);
+
+    for (long i = (long)ret - 1; i >= 0; i--) {
+        cariboulite_sample_complex_int16 s = native[i];
+        samples[2 * i] = s.i / 4096.0f;
+        samples[2 * i + 1] = s.q / 4096.0f;
     }
-    fclose(fp);
+    return ret;
+}
+
+// Streaming reception
+// A reader thread (like the one behind CaribouLiteRadio::StartReceiving) reads one chunk at a time
+// into a ring of slots owned by the caller. The counters are shared with the consumer (rx_ring_state
+// in cariboulite_radio.py) and only accessed atomically: head is published with release semantics
+// after the slot is filled, the consumer releases slots through radio_stream_release().
+typedef struct {
+    long head;     // chunks deposited by the reader thread
+    long tail;     // chunks released by the consumer
+    long overruns; // chunks dropped because the ring was full
+    long errors;   // failed reads
+    int running;
+} rx_ring_state;
+
+typedef struct {
+    cariboulite_radio_state_st* radio;
+    rx_ring_state* state;
+    uint8_t* slots;      // n_slots * slot_samples samples, native (int16 I/Q) or float I/Q
+    uint8_t* meta;       // n_slots * slot_samples metadata bytes
+    int32_t* lengths;    // number of samples in each slot
+    long n_slots;
+    long slot_samples;
+    int as_float;
+    cariboulite_sample_complex_int16* scratch; // chunks read while the ring is full
+    pthread_t thread;
+} rx_stream;
+
+static void* rx_stream_reader(void* arg)
+{
+    rx_stream* stream = arg;
+    rx_ring_state* state = stream->state;
+    size_t sample_size = stream->as_float ? 2 * sizeof(float) : sizeof(cariboulite_sample_complex_int16);
 
-    // [4 - Run Length Encoding (RLE) on the binary data to send]
-    long *runs = malloc(bitcount * sizeof(long));
-    long run_count = 0, count = 1;
-    for (long i = 1; i < bitcount; i++) {
-        if (bitstream[i] == bitstream[i - 1]) count++;
-        else { runs[run_count++] = count; count = 1; }
+    while (__atomic_load_n(&state->running, __ATOMIC_RELAXED)) {
+        long head = state->head;
+        if (head - __atomic_load_n(&state->tail, __ATOMIC_ACQUIRE) >= stream->n_slots) {
+            // Consumer behind: keep draining the radio, the chunk is lost
+            int ret = cariboulite_radio_read_samples(stream->radio, stream->scratch, NULL, stream->slot_samples);
+            if (ret > 0) __atomic_fetch_add(&state->overruns, 1, __ATOMIC_RELAXED);
+            if (ret < 0) usleep(READ_ERROR_BACKOFF_US);
+            continue;
+        }
+
+        long slot = head % stream->n_slots;
+        void* samples = stream->slots + slot * stream->slot_samples * sample_size;
+        uint8_t* meta = stream->meta ? stream->meta + slot * stream->slot_samples : NULL;
+        int ret = stream->as_float ? radio_read_samples_cf32(stream->radio, samples, meta, stream->slot_samples)
+                                   : radio_read_samples_cs16(stream->radio, samples, meta, stream->slot_samples);
+        if (ret < 0) {
+            __atomic_fetch_add(&state->errors, 1, __ATOMIC_RELAXED);
+            usleep(READ_ERROR_BACKOFF_US);
+        }
+        if (ret <= 0) continue;
+
+        stream->lengths[slot] = ret;
+        __atomic_store_n(&state->head, head + 1, __ATOMIC_RELEASE);
     }
-    runs[run_count++] = count;
+    return NULL;
+}
 
-    // [5 - Broadcasting the RLE-OOK-encoded binary data
-    uint8_t current = bitstream[0]; // The broadcasted message should start with a binary value = 1 -> "on"
-    for (long i = 0; i < run_count; i++) {
-        int run_len = runs[i];
-        if (current == 1) start_tx(radio); // if binary val == 1 -> "on"
-        else stop_tx(radio); // if binary val == 0 -> "off"
+size_t radio_mtu_samples(cariboulite_radio_state_st* radio)
+{
+    return cariboulite_radio_get_native_mtu_size_samples(radio);
+}
 
-        // For timing and sychronization purposes, increasing the TX delays by constant values
-        double factor = (run_len > 1) ? MULTIPLE_FACTOR : SINGLE_FACTOR;
-        usleep(run_len * DEFAULT_BIT_US * factor);
-        current ^= 1;
+// Start the reader thread, the radio must be receiving (radio_start_receiving)
+// Return the stream handle, NULL on failure
+rx_stream* radio_stream_start(cariboulite_radio_state_st* radio, rx_ring_state* state, void* slots, uint8_t* meta,
+                              int32_t* lengths, long n_slots, long slot_samples, int as_float)
+{
+    rx_stream* stream = calloc(1, sizeof(rx_stream));
+    if (stream) stream->scratch = malloc(slot_samples * sizeof(cariboulite_sample_complex_int16));
+    if (!stream || !stream->scratch) {
+        printf("Memory allocation failed\n");
+        free(stream);
+        return NULL;
     }
 
-    // [6 - Closing the Cariboulite board]
-    // Freeing memory
-    free(bitstream);
-    free(runs);
+    stream->radio = radio;
+    stream->state = state;
+    stream->slots = slots;
+    stream->meta = meta;
+    stream->lengths = lengths;
+    stream->n_slots = n_slots;
+    stream->slot_samples = slot_samples;
+    stream->as_float = as_float;
 
-    // Equivalent to the real "stop_tx" function in the official C++ API
-    cariboulite_radio_set_cw_outputs(radio, false, false);
-    cariboulite_radio_activate_channel(radio, cariboulite_channel_dir_tx, false);
+    __atomic_store_n(&state->running, 1, __ATOMIC_RELAXED);
+    if (pthread_create(&stream->thread, NULL, rx_stream_reader, stream) != 0) {
+        printf("Failed to start the reader thread\n");
+        free(stream->scratch);
+        free(stream);
+        return NULL;
+    }
+    return stream;
+}
+
+// Wait (up to timeout_ms) until a chunk that has not been released yet is available, or the stream is stopped
+// Return the number of chunks deposited so far (acquire: the slots below it can be read)
+// Only the ring state (owned by the caller) is used, so the wait is safe while another thread stops the stream
+long radio_stream_wait(rx_ring_state* state, int timeout_ms)
+{
+    long tail = __atomic_load_n(&state->tail, __ATOMIC_RELAXED);
+    for (int waited_us = 0; ; waited_us += 100) {
+        long head = __atomic_load_n(&state->head, __ATOMIC_ACQUIRE);
+        if (head > tail || waited_us >= timeout_ms * 1000 || !__atomic_load_n(&state->running, __ATOMIC_RELAXED))
+            return head;
+        usleep(100);
+    }
+}
+
+// Hand the oldest slot back to the reader thread (release: the consumer is done reading it)
+void radio_stream_release(rx_ring_state* state)
+{
+    __atomic_fetch_add(&state->tail, 1, __ATOMIC_RELEASE);
+}
+
+// Stop and join the reader thread, the slots are no longer written once this returns
+void radio_stream_stop(rx_stream* stream)
+{
+    if (!stream) return;
+    __atomic_store_n(&stream->state->running, 0, __ATOMIC_RELAXED);
+    pthread_join(stream->thread, NULL);
+    free(stream->scratch);
+    free(stream);
+}
+
+// Stop the transmission / reception and close the Cariboulite board
+void radio_close(cariboulite_radio_state_st* radio)
+{
+    if (radio) {
+        stop_radio(radio);
+        radio_stop_receiving(radio);
+    }
     cariboulite_close();
-    return 0;
+}
+
+
+// One-shot transmit functions: open, configure, send a single file and close the board
+
+// Set the TX parameters
+static void configure_tx(cariboulite_radio_state_st* radio, double sample_rate, double tx_freq, double tx_bw, int tx_power)
+{
+    radio_set_frequency(radio, tx_freq);
+    radio_set_tx_power(radio, tx_power);
+    radio_set_tx_bandwidth(radio, tx_bw);
+    radio_set_sample_rate(radio, sample_rate);
+}
+
+// Main transmit function
+// Exposed function for Python
+int transmit(double sample_rate, double tx_freq, double tx_bw, int tx_power, const char* filepath, const char* channel)
+{
+    /*
+    The main inputs are:
+    - Samplerate
+    - Transmission Frequency
+    - Transmission Bandwidth
+    - Transmission Power
+    - Path to the bitstream file to broadcast (packed .bits or .txt bitstring)
+    - Choice of channel: "s1g" -> low freq channel
+                         "hif" -> high freq channel
+    */
+
+    // [1 - Detect and initialize the Cariboulite board]
+    cariboulite_radio_state_st* radio = radio_open(channel);
+    if (!radio) return -1;
+
+    // [2 - Setting the TX parameters]
+    configure_tx(radio, sample_rate, tx_freq, tx_bw, tx_power);
+
+    // [3 - Broadcasting the bitstring]
+    int ret = radio_send_keyed(radio, filepath, NULL);
+
+    // [4 - Closing the Cariboulite board]
+    radio_close(radio);
+    return ret;
+}
+
+// Sample-accurate OOK transmit function
+// Exposed function for Python
+int transmit_iq(double sample_rate, double tx_freq, double tx_bw, int tx_power, const char* filepath, const char* channel, double bit_rate)
+{
+    /*
+    Same inputs as transmit(), plus:
+    - Bit rate (bit/s)
+    Instead of keying the CW with usleep, the on/off envelope is synthesized as IQ samples
+    and streamed at the sample rate, so every bit lasts exactly sample_rate / bit_rate samples.
+    */
+
+    // [1 - Detect and initialize the Cariboulite board]
+    cariboulite_radio_state_st* radio = radio_open(channel);
+    if (!radio) return -1;
+
+    // [2 - Setting the TX parameters]
+    configure_tx(radio, sample_rate, tx_freq, tx_bw, tx_power);
+
+    // [3 - Streaming the OOK envelope as IQ samples]
+    int ret = radio_send_iq(radio, filepath, bit_rate, NULL);
+
+    // [4 - Closing the Cariboulite board]
+    radio_close(radio);
+    return ret;
 }
@@ -0,0 +1,102 @@
+import csv
+import glob
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .ook_decoding_func import *
+from .types_to_bin_func import decode_bitstream
+
+SUMMARY_FIELDS = ["recording", "frame", "bits", "ser", "values", "error"]
+
+
+def run_error_rate(reference: np.ndarray, decoded: np.ndarray) -> float:
+    """
+    RF symbol error rate of a frame: 1 - symmetric_ratio_average() of the binary run lengths\n
+    Runs missing on either side (frames of different lengths) count as errors.
+    """
+    n = max(len(reference), len(decoded))
+    arr1 = np.zeros(n)
+    arr2 = np.zeros(n)
+    arr1[:len(reference)] = reference
+    arr2[:len(decoded)] = decoded
+    return 1 - symmetric_ratio_average(arr1, arr2) if n else 0.0
+
+def detect_frames(recording_path: str, chunk_size: int = 1 << 20, threshold: float = 0.9) -> list[np.ndarray]:
+    """Worker job: on/off runs of each frame found in a recording"""
+    return split_frames(recording_runs(recording_path, chunk_size), threshold)
+
+def decode_frame_job(recording_path: str, index: int, runs: np.ndarray, output_dir: str,
+                     reference_runs: np.ndarray = None) -> dict:
+    """
+    Worker job: decode one frame and write its files into output_dir/<recording>/frame_<index>\n
+    Return a summary row; a frame which cannot be decoded is reported in 'error' instead of stopping the batch.
+    """
+    name = os.path.splitext(os.path.basename(recording_path))[0]
+    frame_dir = os.path.join(output_dir, name, f"frame_{index}")
+    summary = dict.fromkeys(SUMMARY_FIELDS)
+    summary.update(recording=recording_path, frame=index)
+    try:
+        os.makedirs(frame_dir, exist_ok=True)
+        bits = decode_frame(runs)
+        summary["bits"] = len(bits)
+        if reference_runs is not None:
+            summary["ser"] = run_error_rate(reference_runs, decode_frame_runs(runs))
+        summary["values"] = decode_bitstream(bits, frame_dir)
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    return summary
+
+def batch_decode(directory: str,
+                 output_dir: str = "./reconstructed_data/batch",
+                 reference_path: str = None,
+                 max_workers: int = None,
+                 chunk_size: int = 1 << 20,
+                 threshold: float = 0.9):
+    """
+    Decode every WAV recording of a directory on a process pool, yielding a summary row per frame as soon as it is done\n
+    Each recording is split into frames by one job, then every frame is decoded by its own job.
+    The rows are also appended to output_dir/summary.csv as they come.
+    reference_path: bitstream file that was sent, to compute the symbol error rate of every frame.
+    """
+    recordings = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    reference_runs = bitstring_file_to_runs(reference_path) if reference_path else None
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool, \
+         open(os.path.join(output_dir, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+
+        # future -> (job kind, recording)
+        pending = {pool.submit(detect_frames, path, chunk_size, threshold): ("detect", path) for path in recordings}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, path = pending.pop(future)
+                rows = []
+                if kind == "frame":
+                    rows.append(future.result())
+                elif future.exception() is not None or not future.result():
+                    error = future.exception()
+                    rows.append(dict.fromkeys(SUMMARY_FIELDS) | {
+                        "recording": path,
+                        "error": f"{type(error).__name__}: {error}" if error else "No frame found"})
+                else:
+                    for index, runs in enumerate(future.result()):
+                        job = pool.submit(decode_frame_job, path, index, runs, output_dir, reference_runs)
+                        pending[job] = ("frame", path)
+
+                for row in rows:
+                    writer.writerow(row)
+                    f.flush()
+                    yield row
+
+def ser_summary(rows: list[dict]) -> dict:
+    """Number of frames, decoding failures and mean / worst symbol error rate of a batch"""
+    ser = [row["ser"] for row in rows if row["ser"] is not None]
+    return {"frames": sum(row["frame"] is not None for row in rows),
+            "failed": sum(row["error"] is not None for row in rows),
+            "mean_ser": float(np.mean(ser)) if ser else None,
+            "max_ser": float(np.max(ser)) if ser else None}
@@ -1,27 +1,32 @@
 import numpy as np
 from scipy.io import wavfile
+from scipy.signal import correlate
 import inspect
 
-# from .class_info import payload_type
-# from .types_to_bin_func import *
+from .bit_buffer import bit_buffer
+from .binfile_management_func import read_bitstream_file
+from .class_info import CP_HEAD, CP_TAIL
 
-def rle(arr: np.ndarray) -> list[int]:
+def rle(arr: np.ndarray) -> np.ndarray:
     """
     Function that transforms an on/off sequence to a run length encoding scheme\n
     e.g.: (on on on on off off ...) -> (4 2 ...)
+    The runs are the distances between the positions where the value changes (vectorized, no Python loop).
     """
-    if len(arr) == 0:
-        return []
-    lengths = []
-    count = 1
-    for i in range(1, len(arr)):
-        if arr[i] == arr[i-1]:
-            count += 1
-        else:
-            lengths.append(count)
-            count = 1
-    lengths.append(count)
-    return lengths
+    arr = np.asarray(arr)
+    if arr.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    edges = np.flatnonzero(arr[1:] != arr[:-1]) + 1
+    return np.diff(np.concatenate(([0], edges, [arr.size])))
+
+def runs_to_bits(runs: np.ndarray, first_bit: int = 1) -> np.ndarray:
+    """
+    Inverse RLE: expand the runs into a uint8 array of 0s and 1s, alternating from 'first_bit'\n
+    e.g.: (3 1 2) -> (1 1 1 0 1 1)
+    """
+    runs = np.asarray(runs, dtype=np.int64)
+    values = (np.arange(runs.size) + first_bit) % 2
+    return np.repeat(values.astype(np.uint8), runs)
 
 def interpolator(interp_points: list[int|float], order: int) -> np.poly1d:
     x = np.array([coord[1] for coord in interp_points])
@@ -33,64 +38,52 @@ def interpolator(interp_points: list[int|float], order: int) -> np.poly1d:
 
     return poly
 
-def invert_poly(poly: np.poly1d, y_target: int|float) -> np.float64:
+class ook_calibration:
     """
-    Given a numpy.poly1d 'poly' and a target y value,
-    return all real x such that poly(x) = y_target.
+    Duration model of the on/off runs, fitted once per capture\n
+    On runs grow linearly with the number of bits (start_time_on + n * delta_on).
+    Off runs follow a polynomial fitted on the interpolation points; it is inverted with a
+    monotone lookup table, so a whole array of runs is decoded at once (no root finding per run).
     """
-    # Build the polynomial poly(x) - y_target
-    coeffs = poly.c.copy()
-    coeffs[-1] -= y_target
-
-    # Solve for roots
-    roots = np.roots(coeffs)
-
-    # Keep only real roots (imag part close to zero)
-    # Keep only positive roots
-    real_roots = [r.real for r in roots
-              if abs(r.imag) < 1e-9 and r.real > 0 and r.real < 200]
-
-    return real_roots[0]
-
-def decode_runs(runs: list[int], start_time_on: int|float, delta_on: int|float, interp_points: list[int|float]):
+    def __init__(self, start_time_on: float, delta_on: float, interp_points: list[tuple[float, int]],
+                 order: int = 2, max_bits: int = 200, lut_step: float = 1 / 64):
+        self.start_time_on = start_time_on
+        self.delta_on = delta_on
+        self.poly = interpolator(interp_points, order)
+
+        # Off duration of 0 .. max_bits bits, forced to be non-decreasing so that it can be inverted
+        self.lut_bits = np.arange(0, max_bits + lut_step, lut_step)
+        self.lut_duration = np.maximum.accumulate(self.poly(self.lut_bits))
+
+    def on_bits(self, runs: np.ndarray) -> np.ndarray:
+        return np.rint((np.asarray(runs) - self.start_time_on) / self.delta_on).astype(np.int64)
+
+    def off_bits(self, runs: np.ndarray) -> np.ndarray:
+        # Durations shorter than the model are a single 0 (clamped to 0 bits, then raised to 1 by decode)
+        return np.rint(np.interp(runs, self.lut_duration, self.lut_bits)).astype(np.int64)
+
+    def decode(self, runs: np.ndarray, first_on: bool = True) -> np.ndarray:
+        """On/off runs (in samples) -> binary run lengths, every run is at least one bit"""
+        runs = np.asarray(runs, dtype=float)
+        on = (np.arange(len(runs)) % 2 == 0) == first_on
+        out = np.empty(len(runs), dtype=np.int64)
+        out[on] = self.on_bits(runs[on])
+        out[~on] = self.off_bits(runs[~on])
+        return np.maximum(out, 1)
+
+def decode_runs(runs: np.ndarray, start_time_on: int|float, delta_on: int|float, interp_points: list[int|float], first_on: bool = True) -> np.ndarray:
     """
     Function that will decode the run length encoding scheme (RLE) for on/off values\n
-    into a RLE for binary data
-    """
-    # Build the interpolator and interpolate the function for "off" values
-    poly = interpolator(interp_points, 2)
-
-    out = []
-    for i, r in enumerate(runs):
-            if i % 2 == 0:
-                # peak
-                bin_len = round((r - start_time_on) / delta_on)
-            else:
-                # pause
-                try:
-                    bin_len = round(invert_poly(poly, r))
-                except: 
-                    bin_len = 1 # The interpolator doesn't work sometime when the val is too small
-                                # Anyways, we know it's going to be a 1
-                
-            if bin_len <= 0:
-                out.append(1)
-            else:
-                out.append(bin_len)
-
-    return out
-
-def runs_to_bitstring(runs: list[int]) -> str:
+    into a RLE for binary data (runs alternate between on and off, starting with on if first_on)
+    """
+    return ook_calibration(start_time_on, delta_on, interp_points).decode(runs, first_on)
+
+def runs_to_bitstring(runs: np.ndarray) -> str:
     """
     Function that transforms an RLE scheme for binary data into a bitstring
     """
-    bit = '1'    # always start ON
-    out = []
-
-    for r in runs:
-        out.append(bit * r)
-        bit = '0' if bit == '1' else '1'   # flip
-    return ''.join(out)
+    bits = runs_to_bits(runs) # always start ON
+    return (bits + ord('0')).tobytes().decode("ascii")
 
 
 def symmetric_ratio_average(arr1: np.ndarray, arr2: np.ndarray) -> float:
@@ -109,59 +102,31 @@ def symmetric_ratio_average(arr1: np.ndarray, arr2: np.ndarray) -> float:
 
     return ratios.mean()
 
-def bitstring_file_to_runs(path: str) -> list[int]:
+def bitstring_file_to_runs(path: str) -> np.ndarray:
     """
-    Function that reads a .txt file containing a bitstring to transform it into an RLE scheme
+    Function that reads a bitstream file (packed .bits, or a .txt containing a bitstring) to transform it into an RLE scheme
     """
-    with open(path, 'r') as f:
-        content = f.read()
-
-    # keep only valid bit characters
-    bitstring = ''.join(ch for ch in content if ch in '01')
+    bits = read_bitstream_file(path)
 
-    if not bitstring:
+    if len(bits) == 0:
         raise ValueError("No valid bit data found in file.")
 
-    runs = []
-    count = 1
+    return rle(bits.unpacked())
 
-    for i in range(1, len(bitstring)):
-        if bitstring[i] == bitstring[i-1]:
-            count += 1
-        else:
-            runs.append(count)
-            count = 1
+#####################################################################################
+# Streaming decoder
 
-    runs.append(count)
-    return runs
+CP_HEAD_PATTERN = rle(CP_HEAD.unpacked()) # (1 1 1 1 1 2 1 3 1 4 1 5 2 10 2 20 2 50 2 100 2)
+CP_HEAD_RUNS = len(CP_HEAD_PATTERN)       # 21 on/off runs, used to calibrate the run durations
 
-def ook_decoding(recording_file_path: str) -> list[int]:
+def cp_head_calibration(runs: np.ndarray) -> ook_calibration:
     """
-    Main function that decodes an RF transmision\n
-    encoded with an on/off keying (OOK) scheme
+    Calibrate the on/off durations with the on/off runs of the CP head, RLE ->
+    (1 1 1 1 1 2 1 3 1 4 1 5 2 10 2 20 2 50 2 100 2)\n
+    Return the duration model: start time and duration of a bit for the on runs, interpolation points of the off runs.
     """
-
-    # === Load WAV ===
-    _, data = wavfile.read(recording_file_path)
-
-    I = data[:,0].astype(float)
-    Q = data[:,1].astype(float)
-
-    mag = np.sqrt(I**2 + Q**2)
-    threshold = mag.mean()
-    binary = (mag > threshold).astype(int)
-
-    # find first rising edge
-    rising_edges = np.where((binary[1:] == 1) & (binary[:-1] == 0))[0]
-    if rising_edges.size == 0:
-        raise RuntimeError("No peak found in signal.")
-
-    start = rising_edges[0]+1
-    binary = binary[start:]
-
-    # Transform the on/off value to run length of encoding
-    # e.g.: (on on on on off off ...) -> (4 2 ...) 
-    runs = rle(binary)
+    if len(runs) < CP_HEAD_RUNS:
+        raise RuntimeError(f"The CP head needs {CP_HEAD_RUNS} runs, only {len(runs)} were found.")
 
     # Find the on/off transmision points' length of the CP head
     # The on transmission points' length evolve linearly, so we can do averages
@@ -195,7 +160,259 @@ def ook_decoding(recording_file_path: str) -> list[int]:
     start_time_on = result_on[0][0]
     delta_on = result_on[1][0]
 
-    # Transforming the on/off RLE scheme into RLE binaray data
-    decoded = decode_runs(runs, start_time_on, delta_on, interpolation_points)
+    return ook_calibration(start_time_on, delta_on, interpolation_points)
 
-    return decoded
+def find_preambles(runs: np.ndarray, threshold: float = 0.9, pattern: np.ndarray = CP_HEAD_PATTERN) -> np.ndarray:
+    """
+    Locate the CP heads in a sequence of on/off runs (in samples, the first run is on)\n
+    The log of the run lengths is cross-correlated (FFT) with the log of the CP head RLE pattern and
+    normalized over each window (Pearson coefficient), so the detection does not depend on the sample rate
+    nor on the radio latencies. Return the indices of the on runs where a CP head starts.
+    """
+    m = len(pattern)
+    if len(runs) < m:
+        return np.zeros(0, dtype=np.int64)
+    x = np.log(np.maximum(np.asarray(runs, dtype=float), 1))
+    p = np.log(pattern.astype(float))
+    p = (p - p.mean()) / p.std()
+
+    # Sliding correlation and window statistics
+    corr = correlate(x, p, mode="valid", method="fft")
+    s1 = np.concatenate(([0], np.cumsum(x)))
+    s2 = np.concatenate(([0], np.cumsum(x**2)))
+    mean = (s1[m:] - s1[:-m]) / m
+    std = np.sqrt(np.maximum((s2[m:] - s2[:-m]) / m - mean**2, 0))
+    score = np.divide(corr, m * std, out=np.zeros_like(corr), where=std > 0)
+
+    # Heads start with an on run; keep the best match of overlapping candidates
+    candidates = np.flatnonzero((score > threshold) & (np.arange(len(score)) % 2 == 0))
+    heads = []
+    for k in candidates[np.argsort(-score[candidates], kind="stable")]:
+        if all(abs(k - h) >= m for h in heads):
+            heads.append(k)
+    return np.sort(np.array(heads, dtype=np.int64))
+
+def split_frames(runs: np.ndarray, threshold: float = 0.9) -> list[np.ndarray]:
+    """Split the on/off runs of a whole capture into frames, each one from its CP head to the next CP head"""
+    bounds = list(find_preambles(runs, threshold)) + [len(runs)]
+    return [runs[start:stop] for start, stop in zip(bounds, bounds[1:]) if stop - start >= CP_HEAD_RUNS]
+
+def decode_frame_runs(runs: np.ndarray) -> np.ndarray:
+    """
+    Binary run lengths of one frame (on/off runs from its CP head to the run before the next frame),
+    CP head and tail included; the durations are calibrated on the CP head
+    """
+    calibration = cp_head_calibration(runs[:CP_HEAD_RUNS])
+
+    # The last on run ends with the CP tail, what comes after is the silence between frames
+    last_on = len(runs) - 1 - (len(runs) - 1) % 2
+    return calibration.decode(runs[:last_on + 1])
+
+def decode_frame(runs: np.ndarray) -> bit_buffer:
+    """
+    Decode the on/off runs of one frame, from its CP head to the run before the next frame (or the end of the capture)\n
+    The CP head and the CP tail (the ones of the last on run) are removed.
+    """
+    decoded = decode_frame_runs(runs)[CP_HEAD_RUNS:]
+    if len(decoded) == 0:
+        return bit_buffer()
+    decoded[-1] -= len(CP_TAIL)
+    if decoded[-1] <= 0:
+        decoded = decoded[:-1] # the payload ends with a 0
+    return bit_buffer.from_bits(runs_to_bits(decoded, first_bit=0))
+
+def iq_magnitude(samples: np.ndarray) -> np.ndarray:
+    """Envelope of I/Q samples: (n, 2) I and Q columns (as stored in the WAV recordings) or complex samples"""
+    samples = np.asarray(samples)
+    if np.iscomplexobj(samples):
+        return np.abs(samples)
+    I = samples[:, 0].astype(np.float32)
+    Q = samples[:, 1].astype(np.float32)
+    return np.sqrt(I**2 + Q**2)
+
+def iter_wav_chunks(recording_file_path: str, chunk_size: int = 1 << 20):
+    """Read a WAV recording chunk by chunk, through a memory map (the file is never loaded as a whole)"""
+    _, data = wavfile.read(recording_file_path, mmap=True)
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+class ook_run_detector:
+    """
+    On/off detection of an OOK envelope, chunk by chunk\n
+    The threshold sits halfway between the on and off levels, which are tracked with a slow decay
+    so that the detector adapts to fading. Nothing is kept before the first rising edge (which is only
+    searched once the on level is min_contrast times above the noise floor), and the run still in
+    progress at the end of a chunk is carried to the next one.
+    """
+    def __init__(self, time_constant: float = 1e6, min_contrast: float = 20.0):
+        self.time_constant = time_constant # how fast the on/off levels relax (in samples)
+        self.min_contrast = min_contrast # on/off amplitude ratio needed to start (20 -> 26 dB)
+        self.reset()
+
+    def reset(self) -> None:
+        self._high = None       # on level
+        self._low = None        # off level
+        self._started = False   # first rising edge seen
+        self._value = 0         # level of the run in progress
+        self._count = 0         # length of the run in progress
+
+    @property
+    def threshold(self) -> float:
+        return (self._high + self._low) / 2
+
+    def _update_levels(self, mag: np.ndarray) -> None:
+        low, high = np.percentile(mag, (10, 99.9))
+        if self._high is None:
+            self._low, self._high = low, high
+        else:
+            # Follow new extremes at once, relax slowly otherwise (independently of the chunk size)
+            decay = -np.expm1(-len(mag) / self.time_constant)
+            self._high = max(high, self._high + decay * (high - self._high))
+            self._low = min(low, self._low + decay * (low - self._low))
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Return the runs (in samples) completed in this chunk, continuing the on/off alternation (the very first run is on)"""
+        mag = iq_magnitude(samples)
+        if len(mag) == 0:
+            return np.zeros(0, dtype=np.int64)
+        self._update_levels(mag)
+        binary = (mag > self.threshold).astype(np.int8)
+
+        if not self._started:
+            if self._high < self.min_contrast * self._low:
+                return np.zeros(0, dtype=np.int64) # only noise so far
+
+            # find first rising edge (the previous chunk ended off)
+            edges = np.flatnonzero(np.diff(binary, prepend=self._value) == 1)
+            self._value = binary[-1]
+            if edges.size == 0:
+                return np.zeros(0, dtype=np.int64)
+            self._started = True
+            binary = binary[edges[0]:]
+            self._value, self._count = 1, 0
+
+        # Transform the on/off value to run length of encoding, the first run continues the carried one
+        runs = rle(binary)
+        if binary[0] == self._value:
+            runs[0] += self._count
+        else:
+            runs = np.concatenate(([self._count], runs))
+        self._value = binary[-1]
+        self._count = runs[-1]
+        return runs[:-1]
+
+    def flush(self) -> np.ndarray:
+        """Return the run in progress (end of the recording)"""
+        runs = np.array([self._count] if self._started and self._count else [], dtype=np.int64)
+        self._count = 0
+        return runs
+
+class ook_stream_decoder:
+    """
+    Streaming version of ook_decoding()\n
+    Samples are pushed chunk by chunk (e.g. from iter_wav_chunks() or from the radio); once the runs of
+    the CP head are in, the durations are calibrated and every following run is decoded as soon as it is complete.
+    process() and flush() return the bits decoded so far, the CP head included.
+    """
+    def __init__(self, time_constant: float = 1e6, min_contrast: float = 20.0):
+        self.detector = ook_run_detector(time_constant, min_contrast)
+        self.reset()
+
+    def reset(self) -> None:
+        self.detector.reset()
+        self.calibration = None
+        self.runs = []        # binary run lengths decoded so far
+        self._pending = np.zeros(0, dtype=np.int64)
+        self._n_runs = 0      # on/off runs decoded so far
+
+    def _decode(self, raw_runs: np.ndarray) -> np.ndarray:
+        self._pending = np.concatenate((self._pending, raw_runs))
+        if self.calibration is None:
+            # Skip whatever comes before the CP head (glitches, noise)
+            heads = find_preambles(self._pending)
+            if len(heads) == 0 or len(self._pending) < heads[0] + CP_HEAD_RUNS:
+                if len(heads) == 0:
+                    self._pending = self._pending[_tail_start(self._pending):]
+                return np.zeros(0, dtype=np.uint8)
+            self._pending = self._pending[heads[0]:]
+            self.calibration = cp_head_calibration(self._pending)
+
+        raw, self._pending = self._pending, self._pending[:0]
+        first_on = self._n_runs % 2 == 0
+        decoded = self.calibration.decode(raw, first_on)
+        self._n_runs += len(raw)
+        self.runs.extend(decoded)
+        return runs_to_bits(decoded, first_bit=int(first_on))
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Push a chunk of samples, return the newly decoded bits (uint8 array of 0s and 1s)"""
+        return self._decode(self.detector.process(samples))
+
+    def flush(self) -> np.ndarray:
+        """End of the recording: decode the last run"""
+        raw = self.detector.flush()
+        bits = self._decode(raw)
+        if len(raw) and self.calibration is not None and self._n_runs % 2 == 0:
+            # A trailing off run is cut by the end of the recording, it only counts as a single 0
+            extra = self.runs[-1] - 1
+            self.runs[-1] = 1
+            bits = bits[:len(bits) - extra]
+        return bits
+
+def ook_decoding(recording_file_path: str, chunk_size: int = 1 << 20) -> list[int]:
+    """
+    Main function that decodes an RF transmision\n
+    encoded with an on/off keying (OOK) scheme\n
+    The recording is streamed through a memory map, chunk_size samples at a time.
+    """
+    decoder = ook_stream_decoder()
+    for chunk in iter_wav_chunks(recording_file_path, chunk_size):
+        decoder.process(chunk)
+    decoder.flush()
+
+    if decoder.calibration is None:
+        raise RuntimeError("No peak found in signal.")
+    return decoder.runs
+
+def _tail_start(runs: np.ndarray) -> int:
+    # Index of the last runs that may be the beginning of a CP head (an on run, to keep the on/off parity)
+    keep = max(len(runs) - CP_HEAD_RUNS + 1, 0)
+    return keep + keep % 2
+
+def recording_runs(recording_file_path: str, chunk_size: int = 1 << 20) -> np.ndarray:
+    """On/off runs (in samples) of a whole WAV recording, read chunk by chunk"""
+    detector = ook_run_detector()
+    runs = [detector.process(chunk) for chunk in iter_wav_chunks(recording_file_path, chunk_size)]
+    return np.concatenate(runs + [detector.flush()])
+
+def iter_ook_frames(chunks, threshold: float = 0.9):
+    """
+    Continuous reception: decode every frame found in a stream of I/Q chunks (e.g. iter_wav_chunks() or the radio)\n
+    A frame is yielded (as a bit_buffer without CP head and tail) as soon as the CP head of the next one is
+    detected, the last one at the end of the stream.
+    """
+    detector = ook_run_detector()
+    pending = np.zeros(0, dtype=np.int64)
+
+    def frames(final: bool):
+        nonlocal pending
+        heads = find_preambles(pending, threshold)
+        for start, stop in zip(heads, heads[1:]):
+            yield decode_frame(pending[start:stop])
+        if final and len(heads) and len(pending) >= heads[-1] + CP_HEAD_RUNS:
+            yield decode_frame(pending[heads[-1]:])
+        # Keep the frame in progress, or the last runs which may be the start of a CP head
+        keep = heads[-1] if len(heads) else _tail_start(pending)
+        pending = pending[keep:]
+
+    for chunk in chunks:
+        runs = detector.process(chunk)
+        if len(runs):
+            pending = np.concatenate((pending, runs))
+            yield from frames(final=False)
+    pending = np.concatenate((pending, detector.flush()))
+    yield from frames(final=True)
+
+def ook_decoding_frames(recording_file_path: str, chunk_size: int = 1 << 20, threshold: float = 0.9) -> list[bit_buffer]:
+    """Decode all the frames of a recording, each one without its CP head and tail"""
+    return list(iter_ook_frames(iter_wav_chunks(recording_file_path, chunk_size), threshold))
@@ -2,12 +2,25 @@
 # cython: boundscheck=False
 # cython: wraparound=False
 # cython: cdivision=True
+# distutils: extra_compile_args = -fopenmp -O3
+# distutils: extra_link_args = -fopenmp
+cimport cython
+from functools import lru_cache
 import numpy as np
 cimport numpy as np
-from libc.math cimport sqrt
+from cython.parallel cimport prange
+from libc.math cimport sqrt, rint, floor
+
+# Sample types handled by the kernels: complex64 (std::complex<float>, what the radio API uses) and complex128
+ctypedef fused sample_t:
+    float complex
+    double complex
+
+# Full scale of the radio int16 I/Q samples (same as CaribouLiteRadio::ReadSamples/WriteSamples)
+cdef double CS16_SCALE = 4096.0
 
 # Helper: compute bits per symbol (assume M is power of two)
-cdef inline int _bits_per_symbol(int M):
+cdef inline int _bits_per_symbol(int M) noexcept nogil:
     cdef int b = 0
     cdef int tmp = M
     while tmp > 1:
@@ -15,145 +28,439 @@ cdef inline int _bits_per_symbol(int M):
         b += 1
     return b
 
+# Gray code of a level index, and its inverse
+cdef inline int _gray(int n) noexcept nogil:
+    return n ^ (n >> 1)
+
+cdef inline int _gray_decode(int g) noexcept nogil:
+    cdef int n = g
+    g >>= 1
+    while g:
+        n ^= g
+        g >>= 1
+    return n
+
+# Constellation normalization: sqrt of the average power of the unnormalized grid
+# (levels -L+1, ..., -1, +1, ..., L-1 on each axis -> (L*L - 1) / 3 per axis)
+cdef inline double _qam_norm(int levels_i, int levels_q) noexcept nogil:
+    return sqrt(((levels_i * levels_i - 1) + (levels_q * levels_q - 1)) / 3.0)
+
+# Level index of the closest amplitude along one axis (O(1) slicer)
+cdef inline int _axis_level(double x, int levels) noexcept nogil:
+    cdef double level = rint((x + (levels - 1)) * 0.5)
+    if level < 0.0:
+        return 0
+    if level > levels - 1:
+        return levels - 1
+    return <int>level
+
+# Preallocated output: check a caller buffer (e.g. a ring-buffer slot) or allocate a new one,
+# return the first 'length' elements
+def _output(out, Py_ssize_t length, dtypes):
+    if out is None:
+        return np.empty(length, dtype=dtypes[0])
+    if not isinstance(out, np.ndarray) or out.ndim != 1 or out.dtype not in dtypes or out.shape[0] < length:
+        raise ValueError(f"out must be a 1-D {' or '.join(str(np.dtype(d)) for d in dtypes)} array "
+                         f"of at least {length} elements")
+    return out[:length]
+
 # --------------------
-# Modulator (C-level)
+# Radio sample formats
 # --------------------
-def qam_mod_baseband(np.ndarray[np.uint8_t, ndim=1] bits not None,
-                     int qam_order=16,
-                     int samples_per_symbol=8):
+def cs16_to_complex64(np.ndarray iq not None, out=None):
     """
-    Modulate bits (np.uint8 array of 0/1) to complex128 baseband samples.
-    Returns np.ndarray[np.complex128] of length n_symbols * samples_per_symbol.
+    Convert interleaved int16 I/Q samples (shape (n, 2) or (2n,)) to complex64 in one pass.
+    out: optional preallocated complex64 buffer of at least n samples.
     """
-    cdef int M = qam_order
-    cdef int bps = _bits_per_symbol(M)
-    cdef Py_ssize_t n_bits = bits.shape[0]
+    cdef const short[::1] raw = np.ascontiguousarray(iq, dtype=np.int16).reshape(-1)
+    cdef Py_ssize_t n = raw.shape[0] // 2
+    samples = _output(out, n, (np.complex64,))
+    cdef float complex[:] dst = samples
+    cdef float scale = 1.0 / CS16_SCALE
+    cdef Py_ssize_t i
+    for i in prange(n, nogil=True, schedule='static'):
+        dst[i].real = raw[2 * i] * scale
+        dst[i].imag = raw[2 * i + 1] * scale
+    return samples
 
-    # pad bits to full symbols if needed
-    cdef int pad = (bps - (n_bits % bps)) % bps
-    if pad:
-        bits = np.concatenate((bits, np.zeros(pad, dtype=np.uint8)))
+class demod_workspace:
+    """
+    Scratch buffers of qam_demod_baseband (int16 conversion, matched filter, recovered symbols)\n
+    Pass the same workspace to every call of a receive loop: the buffers only grow, so steady-state
+    calls do not allocate. A workspace must not be shared between threads.
+    """
+    def __init__(self):
+        self._buffers = {}
 
-    cdef Py_ssize_t n_symbols = bits.shape[0] // bps
+    def buffer(self, name, Py_ssize_t length, dtype):
+        """First 'length' elements of the scratch buffer 'name', reallocated only when too small"""
+        buf = self._buffers.get(name)
+        if buf is None or buf.dtype != dtype or buf.shape[0] < length:
+            buf = np.empty(length, dtype=dtype)
+            self._buffers[name] = buf
+        return buf[:length]
+
+def _scratch(workspace, name, Py_ssize_t length, dtype):
+    if workspace is None:
+        return np.empty(length, dtype=dtype)
+    return workspace.buffer(name, length, dtype)
+
+def _as_samples(baseband, workspace=None):
+    # complex64 / complex128 are used as they are (no copy), int16 I/Q is converted to complex64
+    baseband = np.asarray(baseband)
+    if baseband.dtype == np.int16:
+        return cs16_to_complex64(baseband, _scratch(workspace, "samples", baseband.size // 2, np.complex64))
+    if baseband.dtype != np.complex64 and baseband.dtype != np.complex128:
+        return baseband.astype(np.complex128)
+    return baseband
 
-    # create symbol indices (integers 0..M-1)
-    cdef np.ndarray[np.int32_t, ndim=1] symbols = np.empty(n_symbols, dtype=np.int32)
+# --------------------
+# Modulator (C-level)
+# --------------------
+# Symbol index of symbol i (MSB first), the bits past the end are zero padding
+cdef inline int _pack_symbol(const unsigned char[::1] bits, Py_ssize_t i, int bps) noexcept nogil:
+    cdef int acc = 0
+    cdef Py_ssize_t b
+    for b in range(i * bps, (i + 1) * bps):
+        acc = (acc << 1) | (<int>bits[b] if b < bits.shape[0] else 0)
+    return acc
+
+cdef void _fill_baseband(const unsigned char[::1] bits, int bps, int samples_per_symbol,
+                         sample_t[:] baseband) noexcept nogil:
+    # map integer symbol k -> Gray-coded QAM point (I + jQ), same mapping as QAM_modulation.qam_constellation:
+    # the first ceil(bps/2) bits select the I level, the other bits the Q level
+    cdef int bits_q = bps // 2
+    cdef int levels_i = 1 << (bps - bits_q)
+    cdef int levels_q = 1 << bits_q
+    cdef double norm = _qam_norm(levels_i, levels_q) # average power of the constellation normalized to 1
+    cdef Py_ssize_t n_symbols = baseband.shape[0] // samples_per_symbol
     cdef Py_ssize_t i, j
-    cdef int acc
-    for i in range(n_symbols):
-        acc = 0
-        # pack bps bits into acc (MSB first)
-        for j in range(bps):
-            acc = (acc << 1) | <int>bits[i*bps + j]
-        symbols[i] = acc
-
-    # map integer symbol k -> QAM point (I + jQ)
-    # Using square 2D grid mapping: low 2 bits -> I level, high bits -> Q level for powers-of-4 M
-    cdef np.ndarray[np.complex128_t, ndim=1] qam_sym = np.empty(n_symbols, dtype=np.complex128)
+    cdef int k
     cdef double I, Q
-    for i in range(n_symbols):
-        # for conventional mapping used elsewhere: I = 2*((k % 4) - 1.5), Q = 2*((k // 4)-1.5)
-        # this works for 16-QAM; for larger M this pattern still maps on 4x... grid by decomposition
-        k = symbols[i]
-        I = 2.0 * ((k % 4) - 1.5)
-        Q = 2.0 * ((k // 4) - 1.5)
-        qam_sym[i] = I + 1j * Q
-
-    # Normalize average power to 1
-    cdef double avgp = 0.0
-    for i in range(n_symbols):
-        avgp += (qam_sym[i].real*qam_sym[i].real + qam_sym[i].imag*qam_sym[i].imag)
-    avgp /= n_symbols
-    cdef double norm = sqrt(avgp)
-    if norm != 0.0:
-        for i in range(n_symbols):
-            qam_sym[i] /= norm
-
-    # Upsample / pulse shape: here we output rectangular (repetition) samples_per_symbol each.
-    # Pre-allocate output
-    cdef Py_ssize_t out_len = n_symbols * samples_per_symbol
-    cdef np.ndarray[np.complex128_t, ndim=1] baseband = np.empty(out_len, dtype=np.complex128)
-    cdef Py_ssize_t idx_out
-    for i in range(n_symbols):
-        idx_out = i * samples_per_symbol
-        # fill samples_per_symbol copies
-        for j in range(samples_per_symbol):
-            baseband[idx_out + j] = qam_sym[i]
+    # symbols are independent: split them between the threads
+    for i in prange(n_symbols, schedule='static'):
+        k = _pack_symbol(bits, i, bps)
+        I = (2.0 * _gray_decode(k >> bits_q) - (levels_i - 1)) / norm
+        Q = (2.0 * _gray_decode(k & (levels_q - 1)) - (levels_q - 1)) / norm
+
+        # Upsample / pulse shape: rectangular (repetition) samples_per_symbol each
+        for j in range(i * samples_per_symbol, (i + 1) * samples_per_symbol):
+            baseband[j].real = I
+            baseband[j].imag = Q
+
+# --------------------
+# Root-raised-cosine pulse shaping (same filter as QAM_modulation.rrc_taps)
+# --------------------
+cdef enum:
+    RRC_SPAN = 8 # length of the RRC filter in symbols
+
+@lru_cache(maxsize=16)
+def _rrc_taps(int samples_per_symbol, double rolloff):
+    # span * sps + 1 taps, unit energy (cached, read-only)
+    t = np.arange(-RRC_SPAN * samples_per_symbol / 2, RRC_SPAN * samples_per_symbol / 2 + 1) / samples_per_symbol
+    b = rolloff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taps = (np.sin(np.pi * t * (1 - b)) + 4 * b * t * np.cos(np.pi * t * (1 + b))) \
+               / (np.pi * t * (1 - (4 * b * t)**2))
+    taps[t == 0] = 1 - b + 4 * b / np.pi
+    if b > 0:
+        taps[np.isclose(np.abs(t), 1 / (4 * b))] = b / np.sqrt(2) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * b))
+                                                                     + (1 - 2 / np.pi) * np.cos(np.pi / (4 * b)))
+    taps = np.ascontiguousarray(taps / np.sqrt(np.sum(taps**2)))
+    taps.flags.writeable = False
+    return taps
+
+# Polyphase interpolation: out[n * factor + p] = sum_q taps[q * factor + p] * symbols[n - q],
+# the products with the stuffed zeros are never computed
+cdef void _polyphase_upsample(sample_t[:] symbols, const double[::1] taps, int factor, sample_t[:] out) noexcept nogil:
+    cdef Py_ssize_t n_taps = taps.shape[0]
+    cdef Py_ssize_t i, n, q, k
+    cdef int p
+    cdef double complex acc
+    for i in prange(out.shape[0], schedule='static'):
+        n = i // factor
+        p = i % factor
+        acc = 0
+        q = 0
+        k = p
+        while k < n_taps and q <= n:
+            if n - q < symbols.shape[0]:
+                acc = acc + taps[k] * <double complex>symbols[n - q]
+            q = q + 1
+            k = k + factor
+        out[i].real = acc.real
+        out[i].imag = acc.imag
+
+# Polyphase decimation: out[m] = sum_k taps[k] * x[offset + m * factor - k], only the kept outputs are computed
+cdef void _polyphase_decimate(sample_t[:] x, const double[::1] taps, int factor, Py_ssize_t offset,
+                              sample_t[:] out) noexcept nogil:
+    cdef Py_ssize_t m, k, j
+    cdef double complex acc
+    for m in prange(out.shape[0], schedule='static'):
+        acc = 0
+        for k in range(taps.shape[0]):
+            j = offset + m * factor - k
+            if 0 <= j < x.shape[0]:
+                acc = acc + taps[k] * <double complex>x[j]
+        out[m].real = acc.real
+        out[m].imag = acc.imag
+
+def qam_mod_baseband(np.ndarray[np.uint8_t, ndim=1] bits not None,
+                     int qam_order=16,
+                     int samples_per_symbol=8,
+                     dtype=np.complex128,
+                     out=None,
+                     str pulse="rect",
+                     double rolloff=0.35):
+    """
+    Modulate bits (np.uint8 array of 0/1) to complex baseband samples.
+    dtype is np.complex128 or np.complex64 (half the memory, the sample type of the radio API).
+    out: optional preallocated complex64/complex128 buffer (its dtype wins over 'dtype'), filled in place.
+    pulse="rrc": root-raised-cosine shaping (polyphase), (n_symbols + RRC_SPAN) * samples_per_symbol samples.
+    pulse="rect": rectangular (repetition) pulses, n_symbols * samples_per_symbol samples.
+    Returns np.ndarray[dtype] (a view of out when given).
+    The last symbol is zero padded, the symbols are processed in parallel without the GIL.
+    """
+    cdef int bps = _bits_per_symbol(qam_order)
+    cdef Py_ssize_t n_symbols = (bits.shape[0] + bps - 1) // bps
+    if pulse not in ("rrc", "rect"):
+        raise ValueError(f"Unknown pulse shape '{pulse}', use 'rrc' or 'rect'")
+    if out is None and np.dtype(dtype) not in (np.complex64, np.complex128):
+        raise ValueError(f"Unsupported sample type {np.dtype(dtype)}, use complex64 or complex128")
+    cdef Py_ssize_t out_len = (n_symbols + (RRC_SPAN if pulse == "rrc" else 0)) * samples_per_symbol
+    baseband = _output(out, out_len, (dtype,) if out is None else (np.complex64, np.complex128))
+
+    # typed views are bound with the GIL, the kernels then run without it
+    cdef const unsigned char[::1] bits_v = bits
+    cdef float complex[:] points_f, out_f
+    cdef double complex[:] points_d, out_d
+    cdef const double[::1] taps_v
+
+    if pulse == "rect":
+        if baseband.dtype == np.complex64:
+            out_f = baseband
+            with nogil:
+                _fill_baseband(bits_v, bps, samples_per_symbol, out_f)
+        else:
+            out_d = baseband
+            with nogil:
+                _fill_baseband(bits_v, bps, samples_per_symbol, out_d)
+        return baseband
 
+    # One point per symbol, then the polyphase RRC interpolator
+    points = np.empty(n_symbols, dtype=baseband.dtype)
+    taps_v = _rrc_taps(samples_per_symbol, rolloff)
+    if baseband.dtype == np.complex64:
+        points_f = points
+        out_f = baseband
+        with nogil:
+            _fill_baseband(bits_v, bps, 1, points_f)
+            _polyphase_upsample(points_f, taps_v, samples_per_symbol, out_f)
+    else:
+        points_d = points
+        out_d = baseband
+        with nogil:
+            _fill_baseband(bits_v, bps, 1, points_d)
+            _polyphase_upsample(points_d, taps_v, samples_per_symbol, out_d)
     return baseband
 
+# --------------------
+# Symbol timing recovery (Gardner loop + polyphase interpolator, same as QAM_modulation.symbol_timing_recovery)
+# --------------------
+cdef enum:
+    INTERP_PHASES = 32 # fractional delays of the interpolator
+    INTERP_TAPS = 8    # taps per phase
+
+def _interp_bank():
+    # windowed-sinc fractional delays, row p interpolates at i + p / INTERP_PHASES
+    k = np.arange(INTERP_TAPS) - (INTERP_TAPS // 2 - 1)
+    frac = np.arange(INTERP_PHASES + 1)[:, None] / INTERP_PHASES
+    bank = np.sinc(k[None, :] - frac) * np.kaiser(INTERP_TAPS + 1, 5.0)[None, :INTERP_TAPS]
+    return np.ascontiguousarray(bank / bank.sum(axis=1, keepdims=True))
+
+_INTERP_BANK = _interp_bank()
+
+# x[i] with zeros before the first sample and the last sample repeated after the end
+cdef inline double complex _sample_at(sample_t[:] x, Py_ssize_t i) noexcept nogil:
+    if i < 0:
+        return 0
+    if i >= x.shape[0]:
+        i = x.shape[0] - 1
+    return <double complex>x[i]
+
+cdef inline double complex _interpolate(sample_t[:] x, double t, const double[:, ::1] bank) noexcept nogil:
+    cdef Py_ssize_t i = <Py_ssize_t>floor(t)
+    cdef int p = <int>rint((t - i) * INTERP_PHASES)
+    cdef double complex acc = 0
+    cdef int k
+    for k in range(INTERP_TAPS):
+        acc = acc + bank[p, k] * _sample_at(x, i - (INTERP_TAPS // 2 - 1) + k)
+    return acc
+
+cdef Py_ssize_t _gardner_loop(sample_t[:] x, double sps, const double[:, ::1] bank, double gain,
+                              double k1, double k2, sample_t[:] out) noexcept nogil:
+    # the first strobe is at the first input sample, the error is scaled by 'gain' (1 / input power)
+    cdef double t = 0.0
+    cdef double integrator = 0.0, err, adjust
+    cdef double complex sym, mid, prev = 0
+    cdef Py_ssize_t n = 0
+    while n < out.shape[0] and floor(t) < x.shape[0] + sps:
+        sym = _interpolate(x, t, bank)
+        mid = _interpolate(x, t - sps / 2, bank)
+        err = gain * (mid.real * (sym.real - prev.real) + mid.imag * (sym.imag - prev.imag))
+        integrator += k2 * err
+        out[n].real = sym.real
+        out[n].imag = sym.imag
+        n += 1
+        prev = sym
+        adjust = k1 * err + integrator
+        if adjust > sps / 2:
+            adjust = sps / 2
+        elif adjust < -sps / 2:
+            adjust = -sps / 2
+        t += sps - adjust
+    return n
+
+cdef double _mean_power(sample_t[:] x) noexcept nogil:
+    cdef double acc = 0.0
+    cdef Py_ssize_t i
+    for i in prange(x.shape[0], schedule='static'):
+        acc += x[i].real * x[i].real + x[i].imag * x[i].imag
+    return acc / x.shape[0] if x.shape[0] else 0.0
+
+def _recover_symbols(baseband, int samples_per_symbol, Py_ssize_t n_symbols, double loop_bw=0.01, double damping=1.0,
+                     workspace=None):
+    """Strobe n_symbols symbols with the Gardner loop (the error is normalized by the input power)."""
+    cdef double theta = loop_bw / (damping + 1 / (4 * damping))
+    cdef double d = 1 + 2 * damping * theta + theta * theta
+    cdef double k1 = 4 * damping * theta / d, k2 = 4 * theta * theta / d
+    cdef double power
+    cdef Py_ssize_t n
+    symbols_rx = _scratch(workspace, "symbols", n_symbols, baseband.dtype)
+    if n_symbols == 0:
+        return symbols_rx
+    cdef const double[:, ::1] bank = _INTERP_BANK
+    cdef float complex[:] x_f, sym_f
+    cdef double complex[:] x_d, sym_d
+    if baseband.dtype == np.complex64:
+        x_f = baseband
+        sym_f = symbols_rx
+        with nogil:
+            power = _mean_power(x_f)
+            n = _gardner_loop(x_f, samples_per_symbol, bank, 1 / power if power > 0.0 else 1.0, k1, k2, sym_f)
+    else:
+        x_d = baseband
+        sym_d = symbols_rx
+        with nogil:
+            power = _mean_power(x_d)
+            n = _gardner_loop(x_d, samples_per_symbol, bank, 1 / power if power > 0.0 else 1.0, k1, k2, sym_d)
+    return symbols_rx[:n]
+
 # --------------------
 # Demodulator (C-level)
 # --------------------
-def qam_demod_baseband(np.ndarray[np.complex128_t, ndim=1] baseband not None,
+# Per-axis decision of one symbol on the Gray-coded grid (same mapping as mod), bits written MSB first
+cdef inline void _slice_one(double I, double Q, int bps, int bits_q, int levels_i, int levels_q,
+                            unsigned char[:] bits_out, Py_ssize_t pos) noexcept nogil:
+    cdef int val = (_gray(_axis_level(I, levels_i)) << bits_q) | _gray(_axis_level(Q, levels_q))
+    cdef int j
+    for j in range(bps - 1, -1, -1):
+        bits_out[pos + j] = <unsigned char>(val & 1)
+        val = val >> 1
+
+cdef void _slice_symbols(sample_t[:] symbols_rx, int bps, unsigned char[:] bits_out) noexcept nogil:
+    cdef Py_ssize_t i
+
+    # normalize power
+    cdef double avgp = _mean_power(symbols_rx)
+    cdef double norm = sqrt(avgp) if avgp > 0.0 else 1.0
+
+    # per-axis decision, O(1) per symbol, symbols split between the threads
+    cdef int bits_q = bps // 2
+    cdef int levels_i = 1 << (bps - bits_q)
+    cdef int levels_q = 1 << bits_q
+    cdef double cnorm = _qam_norm(levels_i, levels_q) / norm
+    for i in prange(symbols_rx.shape[0], schedule='static'):
+        _slice_one(symbols_rx[i].real * cnorm, symbols_rx[i].imag * cnorm, bps, bits_q, levels_i, levels_q,
+                   bits_out, i * bps)
+
+def qam_demod_baseband(baseband not None,
                        int qam_order=16,
-                       int samples_per_symbol=8):
+                       int samples_per_symbol=8,
+                       timing_recovery=None,
+                       out=None,
+                       str pulse="rect",
+                       double rolloff=0.35,
+                       workspace=None):
     """
     Demodulate complex baseband samples to bit array (np.uint8).
-    Assumes perfect timing (symbol boundaries aligned to sample 0).
-    Returns np.ndarray[np.uint8_t] of length n_symbols * bits_per_symbol.
+    The samples can be complex128, complex64 (processed in single precision, no conversion copy)
+    or int16 I/Q pairs as delivered by the radio (converted to complex64).
+    With timing_recovery the symbol instants are tracked with a Gardner loop,
+    otherwise perfect timing is assumed (symbol boundaries aligned to sample 0).
+    By default it is on for "rrc" and off for "rect" pulses.
+    pulse must match the modulator: "rrc" applies the matched filter, decimated to 2 samples
+    per symbol (for an even samples_per_symbol) in the same polyphase pass.
+    out: optional preallocated uint8 buffer of at least n_symbols * bits_per_symbol elements.
+    workspace: optional demod_workspace holding the intermediate buffers between calls.
+    Returns np.ndarray[np.uint8_t] of length n_symbols * bits_per_symbol (a view of out when given).
+    The decisions run in parallel without the GIL.
     """
-    cdef int M = qam_order
-    cdef int bps = _bits_per_symbol(M)
-    cdef Py_ssize_t nsamples = baseband.shape[0]
-    cdef Py_ssize_t n_symbols = nsamples // samples_per_symbol
+    cdef int bps = _bits_per_symbol(qam_order)
+    baseband = _as_samples(baseband, workspace)
+    cdef Py_ssize_t n_symbols = baseband.shape[0] // samples_per_symbol
+    cdef int sps = samples_per_symbol
+    cdef int factor
+    cdef Py_ssize_t offset, n_taps
+    cdef const double[::1] taps_v
+    cdef float complex[:] x_f, y_f
+    cdef double complex[:] x_d, y_d
+    cdef unsigned char[:] bits_v
 
-    # take one sample per symbol (simple sampling)
-    cdef np.ndarray[np.complex128_t, ndim=1] symbols_rx = np.empty(n_symbols, dtype=np.complex128)
-    cdef Py_ssize_t i, j
-    for i in range(n_symbols):
-        symbols_rx[i] = baseband[i * samples_per_symbol]
+    if pulse == "rrc":
+        # Matched filter: symbol k peaks at k * sps + RRC_SPAN * sps (delay of the two filters)
+        factor = sps // 2 if sps % 2 == 0 else 1
+        taps = _rrc_taps(sps, rolloff)
+        n_taps = taps.shape[0]
+        offset = RRC_SPAN * sps
+        filtered = _scratch(workspace, "filtered", max((baseband.shape[0] + n_taps - 1 - offset + factor - 1) // factor, 0),
+                            baseband.dtype)
+        taps_v = taps
+        if baseband.dtype == np.complex64:
+            x_f = baseband
+            y_f = filtered
+            with nogil:
+                _polyphase_decimate(x_f, taps_v, factor, offset, y_f)
+        else:
+            x_d = baseband
+            y_d = filtered
+            with nogil:
+                _polyphase_decimate(x_d, taps_v, factor, offset, y_d)
+        baseband = filtered
+        n_symbols = max(baseband.shape[0] * factor // sps - RRC_SPAN, 0)
+        sps //= factor
+    elif pulse != "rect":
+        raise ValueError(f"Unknown pulse shape '{pulse}', use 'rrc' or 'rect'")
+    if n_symbols == 0:
+        return _output(out, 0, (np.uint8,))
 
-    # normalize power
-    cdef double avgp = 0.0
-    for i in range(n_symbols):
-        avgp += (symbols_rx[i].real*symbols_rx[i].real + symbols_rx[i].imag*symbols_rx[i].imag)
-    avgp /= n_symbols
-    cdef double norm = sqrt(avgp) if avgp > 0.0 else 1.0
-    if norm != 0.0:
-        for i in range(n_symbols):
-            symbols_rx[i] /= norm
+    if timing_recovery is None:
+        timing_recovery = pulse == "rrc"
+    if timing_recovery:
+        symbols_rx = _recover_symbols(baseband, sps, n_symbols, workspace=workspace)
+    else:
+        # take one sample per symbol (strided view, no copy)
+        symbols_rx = baseband[:n_symbols * sps:sps]
 
-    # build reference constellation (same mapping as mod)
-    cdef np.ndarray[np.complex128_t, ndim=1] constellation = np.empty(M, dtype=np.complex128)
-    cdef int k
-    for k in range(M):
-        I = 2.0 * ((k % 4) - 1.5)
-        Q = 2.0 * ((k // 4) - 1.5)
-        constellation[k] = (I + 1j * Q)
-    # normalize constellation
-    cdef double cavg = 0.0
-    for k in range(M):
-        cavg += (constellation[k].real*constellation[k].real + constellation[k].imag*constellation[k].imag)
-    cavg /= M
-    cdef double cnorm = sqrt(cavg)
-    for k in range(M):
-        constellation[k] /= cnorm
-
-    # nearest-neighbor decision (squared distance to avoid sqrt)
-    cdef np.ndarray[np.int32_t, ndim=1] decoded_symbols = np.empty(n_symbols, dtype=np.int32)
-    cdef double best_dist, dist, dx, dy
-    cdef int best_k
-    for i in range(n_symbols):
-        best_dist = 1e300
-        best_k = 0
-        for k in range(M):
-            dx = symbols_rx[i].real - constellation[k].real
-            dy = symbols_rx[i].imag - constellation[k].imag
-            dist = dx*dx + dy*dy
-            if dist < best_dist:
-                best_dist = dist
-                best_k = k
-        decoded_symbols[i] = best_k
-
-    # convert decoded symbols to bits array (MSB-first per symbol)
-    cdef np.ndarray[np.uint8_t, ndim=1] bits_out = np.empty(n_symbols * bps, dtype=np.uint8)
-    cdef int val
-    for i in range(n_symbols):
-        val = decoded_symbols[i]
-        # produce bits from MSB to LSB
-        for j in range(bps-1, -1, -1):
-            bits_out[i*bps + j] = <np.uint8_t>(val & 1)
-            val >>= 1
+    bits_out = _output(out, symbols_rx.shape[0] * bps, (np.uint8,))
+    bits_v = bits_out
+    if symbols_rx.dtype == np.complex64:
+        x_f = symbols_rx
+        with nogil:
+            _slice_symbols(x_f, bps, bits_v)
+    else:
+        x_d = symbols_rx
+        with nogil:
+            _slice_symbols(x_d, bps, bits_v)
 
     return bits_out
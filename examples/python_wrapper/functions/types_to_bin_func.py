@@ -1,7 +1,13 @@
+import csv
+import itertools
+import json
+import os
 import struct
 from PIL import Image
 import numpy as np
 
+from .bit_buffer import bit_buffer, as_bit_buffer
+from .background_writer import background_writer
 from .csv_management_func import *
 from .txt_management_func import *
 from .binfile_management_func import *
@@ -9,198 +15,335 @@ from .jason_management_func import *
 
 
 ##### Ints #####
-def int_to_binary(n: int) -> str:
-    """Convert an integer to its binary string (without 0b prefix)."""
-    # Method: using format()
-    binary_data = format(n, 'b')  # same result, but more flexible for padding
+def int_to_binary(n: int) -> bit_buffer:
+    """Convert an integer to its binary representation (minimal width, like format(n, 'b'))."""
+    return bit_buffer.from_int(n)
 
-    return binary_data
 
-
-def binary_str_to_int(bstr: str) -> int:
-    """Convert a binary string like '1101' into an integer."""
-    return int(bstr, 2)
+def binary_str_to_int(bstr: bit_buffer | str) -> int:
+    """Convert a binary representation like '1101' into an integer."""
+    return as_bit_buffer(bstr).to_int()
 
 
 
 ##### Floats #####
-def float64_to_bin(f: float) -> str:
-    """Convert a Python float into a binary string (IEEE 754, 64-bit)."""
+def float64_to_bin(f: float) -> bit_buffer:
+    """Convert a Python float into its binary representation (IEEE 754, 64-bit)."""
     # Pack float into 8 bytes (double precision)
     packed = struct.pack('!d', f)  # ! = network (big-endian), d = double
-    # Convert bytes to bits
-    bits = ''.join(f'{byte:08b}' for byte in packed)
-    return bits
+    return bit_buffer.from_bytes(packed)
 
-def float32_to_bin(f: float) -> str:
-    """Convert a Python float into a 32-bit binary string."""
+def float32_to_bin(f: float) -> bit_buffer:
+    """Convert a Python float into its 32-bit binary representation."""
     packed = struct.pack('!f', f)  # ! = big-endian, f = 32-bit float
-    return ''.join(f'{byte:08b}' for byte in packed)
+    return bit_buffer.from_bytes(packed)
 
-def bin_to_float32or64(bstr: str) -> float:
-    """Convert a 32-bit or 64-bit binary string (IEEE 754) back into a Python float."""
-    if len(bstr) != 64 and len(bstr) != 32:
+def bin_to_float32or64(bstr: bit_buffer | str) -> float:
+    """Convert a 32-bit or 64-bit binary representation (IEEE 754) back into a Python float."""
+    bits = as_bit_buffer(bstr)
+    if len(bits) != 64 and len(bits) != 32:
         raise ValueError("Binary string must be exactly 32 or 64 bits for float 32/64 conversion.")
     
-    if len(bstr) == 32: #TODO Voir pourquoi ça crée un peu d'imprécision
-        as_bytes = int(bstr, 2).to_bytes(4, byteorder='big')
-        return struct.unpack('!f', as_bytes)[0]
+    if len(bits) == 32: # Float 32 (only ~7 significant digits survive the round trip)
+        return struct.unpack('!f', bits.tobytes())[0]
     else: # Float 64
-         # Convert bitstring to bytes
-        as_bytes = int(bstr, 2).to_bytes(8, byteorder='big')
-        # Unpack bytes into float
-        return struct.unpack('!d', as_bytes)[0]
+        return struct.unpack('!d', bits.tobytes())[0]
 
 
 
 ##### Strings #####
-def str_to_bin(s: str) -> str:
-    """Convert a text string into a binary string (8 bits per char)."""
-    return ''.join(format(ord(c), '08b') for c in s)
-
-def bin_to_str(bstr: str) -> str:
-    """Convert a binary string (multiple of 8 bits) back into text."""
-    if len(bstr) % 8 != 0:
+def str_to_bin(s: str) -> bit_buffer:
+    """Convert a text string into its binary representation (8 bits per char)."""
+    return bit_buffer.from_bytes(s.encode('latin-1'))
+
+def bin_to_str(bstr: bit_buffer | str) -> str:
+    """Convert a binary representation (multiple of 8 bits) back into text."""
+    bits = as_bit_buffer(bstr)
+    if len(bits) % 8 != 0:
         raise ValueError("Binary string length must be a multiple of 8.")
-    chars = [chr(int(bstr[i:i+8], 2)) for i in range(0, len(bstr), 8)]
-    return ''.join(chars)
+    return bits.tobytes().decode('latin-1')
 
 
 
 ##### Images #####
-def image_to_bitstring(path: str, mode: str = 'RGB') -> tuple[str, int, int, str]:
+IMAGE_CHANNELS = {'L': 1, 'RGB': 3} # bytes per pixel of the supported color modes
+
+def _check_image_mode(mode: str) -> None:
+    if mode not in IMAGE_CHANNELS:
+        raise ValueError("Unsupported mode: use 'RGB' or 'L'")
+
+def image_to_bitstring(path: str, mode: str = 'RGB') -> tuple[bit_buffer, int, int, str]:
     """
-    Convert an image file into a binary string.
+    Convert an image file into its binary representation.
     mode: 'RGB' for color (3×8 bits/pixel) or 'L' for grayscale (8 bits/pixel)
     """
+    _check_image_mode(mode)
+
     img = Image.open(path).convert(mode)
-    pixels = list(img.getdata())
     width, height = img.size
 
-    # Flatten depending on mode
-    if mode == 'RGB':
-        flat = [v for pixel in pixels for v in pixel]
-    elif mode == 'L':  # grayscale = single int per pixel
-        flat = pixels
-    else:
-        raise ValueError("Unsupported mode: use 'RGB' or 'L'")
+    # PIL pixel buffer seen as a numpy array, row-major and already interleaved for RGB
+    bits = bit_buffer(np.asarray(img))
 
-    bitstring = ''.join(format(v, '08b') for v in flat)
+    return bits, width, height, mode
 
-    return bitstring, width, height, mode
+def iter_image_bands(path: str, mode: str = 'RGB', rows_per_band: int = 64):
+    """
+    Yield an image as bit buffers of 'rows_per_band' rows each (same byte order as image_to_bitstring)\n
+    The source image is decoded whole on the first band; the color conversion is done band by band,
+    so only one converted band is alive at a time. The file is closed when the generator ends or is closed.
+    """
+    _check_image_mode(mode)
+
+    with Image.open(path) as img:
+        width, height = img.size
+        for top in range(0, height, rows_per_band):
+            band = img.crop((0, top, width, min(top + rows_per_band, height))).convert(mode)
+            yield bit_buffer(np.asarray(band))
+
+def image_bitstring_length(path: str, mode: str = 'RGB') -> tuple[int, int, int]:
+    """Return (width, height, nbits) of the binary representation of an image, without decoding its pixels."""
+    _check_image_mode(mode)
+
+    with Image.open(path) as img: # Only the file header is read
+        width, height = img.size
+    return width, height, width * height * IMAGE_CHANNELS[mode] * 8
 
-def bitstring_to_image(bitstring: str, width: int, height: int, mode: str = 'RGB') -> Image.Image:
+def bitstring_to_image(bitstring: bit_buffer | str, width: int, height: int, mode: str = 'RGB') -> Image.Image:
     """
-    Reconstruct an image (RGB or grayscale) from a binary string.
+    Reconstruct an image (RGB or grayscale) from its binary representation.
     """
-    if len(bitstring) % 8 != 0:
+    bits = as_bit_buffer(bitstring)
+    if len(bits) % 8 != 0:
         raise ValueError("Bitstring length must be multiple of 8.")
-    bytes_list = [int(bitstring[i:i+8], 2) for i in range(0, len(bitstring), 8)]
+    _check_image_mode(mode)
 
-    if mode == 'RGB':
-        pixels = [tuple(bytes_list[i:i+3]) for i in range(0, len(bytes_list), 3)]
-    elif mode == 'L':
-        pixels = bytes_list
-    else:
-        raise ValueError("Unsupported mode: use 'RGB' or 'L'")
-
-    img = Image.new(mode, (width, height))
-    img.putdata(pixels)
-    return img
+    # The image is built on top of the packed payload, without copying it
+    return Image.frombuffer(mode, (width, height), bits.memview(), 'raw', mode, 0, 1)
 
 
 ##### Bool #####
-def bool_to_bitstring(value: bool) -> str:
-    """Convert a single boolean to a 1-bit string ('1' or '0')."""
-    return '1' if value else '0'
+def bool_to_bitstring(value: bool) -> bit_buffer:
+    """Convert a single boolean to a 1-bit buffer (1 or 0)."""
+    return bit_buffer.from_int(1 if value else 0, 1)
 
-def bitstring_to_bool(bitstring: str) -> bool:
-    """Convert a 1-bit string ('1' or '0') to a single boolean."""
-    return True if bitstring == "1" else False
+def bitstring_to_bool(bitstring: bit_buffer | str) -> bool:
+    """Convert a 1-bit buffer (1 or 0) to a single boolean."""
+    return as_bit_buffer(bitstring).to_int() == 1
 
 
 ##### Entire bitstream #####
-def encode_chunk(type_id: int, payload_bits: str) -> str:
-    """Prefix type and length to a binary payload."""
-    type_bits = format(type_id, '08b')
-    length_bits = format(len(payload_bits), '032b')
-    return type_bits + length_bits + payload_bits
-
-def decode_bitstream(bitstream: str) -> list:
-    """Iteratively parse type, length, and payload sections."""
+def encode_chunk(type_id: int, payload_bits: bit_buffer | str) -> bit_buffer:
+    """Prefix type (8 bits) and length (32 bits) to a binary payload."""
+    payload = as_bit_buffer(payload_bits)
+    header = bit_buffer.from_bytes(struct.pack('!BI', type_id, len(payload)))
+    return bit_buffer.join([header, payload])
+
+def encode_metadata(meta: dict) -> bit_buffer:
+    """Metadata block carried in front of a payload: 32-bit length (bytes) + UTF-8 JSON."""
+    raw = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+    return bit_buffer.from_bytes(struct.pack('!I', len(raw)) + raw)
+
+def split_metadata(payload: bit_buffer) -> tuple[dict, bit_buffer]:
+    """Split a payload into its metadata block (as a dict) and the data that follows it."""
+    n_bytes = payload.read_uint(0, 32)
+    end = 32 + 8 * n_bytes
+    meta = json.loads(bytes(payload.bit_slice(32, end).memview()))
+    return meta, payload.bit_slice(end, len(payload))
+
+def iter_chunk(type_id: int, nbits: int, pieces):
+    """
+    Lazy version of encode_chunk\n
+    Yield the type/length header first, then the payload pieces as they are produced.
+    'nbits' is the total payload length, it must be known before the first piece is encoded.
+    """
+    yield bit_buffer.from_bytes(struct.pack('!BI', type_id, nbits))
+
+    sent = 0
+    for piece in pieces:
+        piece = as_bit_buffer(piece)
+        sent += len(piece)
+        yield piece
+
+    if sent != nbits:
+        raise ValueError(f"Chunk of type {type_id} announced {nbits} bits but {sent} were produced.")
+
+def iter_sections(bitstream: bit_buffer | str):
+    """
+    Lazily parse the type (8 bits), length (32 bits) and payload sections of a bitstream\n
+    Yield (type_id, payload) where payload is a bit_buffer view on the packed input:
+    byte-aligned payloads share memory with the bitstream, unaligned ones are realigned in one vectorized pass.
+    """
+    bitstream = as_bit_buffer(bitstream)
+    raw = memoryview(bitstream.data)
+    n = len(bitstream)
     i = 0
-    results = []
-    while i < len(bitstream):
-        type_id = int(bitstream[i:i+8], 2)
-        length = int(bitstream[i+8:i+40], 2)
-        payload = bitstream[i+40:i+40+length]
-        results.append((type_id, payload))
+    while i + 40 <= n:
+        if i % 8 == 0:
+            type_id, length = struct.unpack_from('!BI', raw, i // 8)
+        else:
+            header = bitstream.read_uint(i, 40)
+            type_id, length = header >> 32, header & 0xFFFFFFFF
+        yield type_id, bitstream.bit_slice(i + 40, i + 40 + length)
         i += 40 + length
 
+def decode_bitstream(bitstream: bit_buffer | str,
+                     output_dir: str = "./reconstructed_data",
+                     writer: background_writer = None) -> list:
+    """
+    Iteratively parse type, length, and payload sections\n
+    Value sections (ints, floats, ...) are returned in order, file sections are decoded and
+    written into 'output_dir' by a background writer. When no writer is given, a private one is
+    used and all the files are written when the function returns; otherwise call writer.wait().
+    """
+    own_writer = writer is None
+    if own_writer:
+        writer = background_writer()
 
-    # Decoding of the bitstream
     result_list = []
-    for type_id, payload in results:
-        if type_id == 0: # Int
-            value = binary_str_to_int(payload)
-            result_list.append(value)
-        elif type_id == 1: # Float
-            value = bin_to_float32or64(payload)
-            result_list.append(value)
-        elif type_id == 2: # String
-            value = bin_to_str(payload)
-            result_list.append(value)
-        elif type_id == 3: # Image
-            # Let's assume the receiver knows the width, height and color mode of received image (always the same)
-            w = 568
-            h = 425
-            mode = "L"
-            img = bitstring_to_image(payload, w, h, mode=mode)
-            
-            print("Receiving image ...")
-            img.save("./reconstructed_data/reconstructed_image.png")
-        elif type_id == 4: # Boolean
-            value = bitstring_to_bool(payload)
-            result_list.append(value)
-        elif type_id == 5: # Telemetry raw binary data
-            print("Receiving bin data from telemetry ...")
-            value = payload
-            bitstring_to_binfile(value, "./reconstructed_data/reconstructed_telemetry_log.bin")
-        elif type_id == 6: # CSV
-            value = bitstream_to_csv(payload)
-
-            # Creating a new CSV file
-            print("Receiving a CSV file ...")
-            # Let's assume the receiver knows the header of the CSV file (always the same)
-            header = ["Timestamp",
-                      "Bus_Voltage_V",
-                      "Bus_Current_A",
-                      "Battery_Temp_C",
-                      "OBDH_Temp_C",
-                      "Panel_Temp_C",
-                      "Mode",
-                      "ADCS_Mode",
-                      "ReactionWheel_Speed_rpm",
-                      "Sun_Vector_X",
-                      "Sun_Vector_Y",
-                      "Sun_Vector_Z"]
-
-            create_csv(header, value, "./reconstructed_data/reconstructed_house_keeping_csv_test_1.csv")
-
-        elif type_id == 7: # .txt
-            print("Receiving a txt report ...")
-            bitstring_to_file(payload, "./reconstructed_data/reconstructed_text_report_1.txt")
-
-        elif type_id == 8: # .json
-            print("Receiving a JSON file ...")
-            bitstring_to_json_file(payload, "./reconstructed_data/reconstructed_house_keeping_json_test_1.json")
+    try:
+        for type_id, payload in iter_sections(bitstream):
+            codec = PAYLOAD_TYPES.get(type_id)
+            if codec is None:
+                print(f"Unknown payload type {type_id}, section skipped")
+                continue
+
+            meta = None
+            if codec.metadata:
+                meta, payload = split_metadata(payload)
+
+            if codec.saver is None:
+                result_list.append(codec.decoder(payload, meta))
+            else:
+                print(f"Receiving {codec.name} ...")
+                writer.submit(codec.saver, payload, meta, os.path.join(output_dir, codec.output_name))
+    finally:
+        if own_writer:
+            writer.close()
 
     return result_list
 
-def bitstring_to_array(bitstring: str) -> np.ndarray:
-    """Convert a string of bits like '110010' to a NumPy array of 0s and 1s."""
-    return np.fromiter((int(b) for b in bitstring), dtype=np.uint8)
+def bitstring_to_array(bitstring: bit_buffer | str) -> np.ndarray:
+    """Convert a bit buffer (or a string of bits like '110010') to a NumPy array of 0s and 1s."""
+    return as_bit_buffer(bitstring).unpacked()
+
+def array_to_bitstring(array: np.ndarray) -> bit_buffer:
+    """Convert a NumPy array of 0s and 1s to a packed bit buffer."""
+    return bit_buffer.from_bits(array)
 
-def array_to_bitstring(array: np.ndarray) -> str:
-    """Convert a NumPy array of 0s and 1s to a bitstring like '110010'."""
-    return ''.join(map(str, array.astype(np.uint8)))
\ No newline at end of file
+
+##### Payload types registry #####
+class payload_codec:
+    """
+    Encoder/decoder pair attached to a payload type id\n
+    encoder(value) -> (meta, nbits, pieces): metadata dict (or None), payload length in bits
+                                             and an iterable of bit buffers producing the payload
+    decoder(payload, meta) -> value          for sections returned by decode_bitstream
+    saver(payload, meta, path)               for sections written to 'output_name' instead
+    """
+    def __init__(self,
+                 type_id: int,
+                 name: str,
+                 encoder,
+                 decoder = None,
+                 saver = None,
+                 output_name: str = None,
+                 metadata: bool = False): # True if a metadata block is carried in front of the payload
+        self.type_id = type_id
+        self.name = name
+        self.encoder = encoder
+        self.decoder = decoder
+        self.saver = saver
+        self.output_name = output_name
+        self.metadata = metadata
+
+PAYLOAD_TYPES: dict[int, payload_codec] = {}
+
+def register_payload_type(type_id: int, name: str, encoder, decoder=None, saver=None,
+                          output_name: str = None, metadata: bool = False) -> payload_codec:
+    """Register a new payload type, so that iter_section() and decode_bitstream() can handle it."""
+    if not 0 <= type_id <= 255:
+        raise ValueError("The type id is carried on 8 bits, it must be between 0 and 255.")
+    if type_id in PAYLOAD_TYPES:
+        raise ValueError(f"The payload type {type_id} is already registered ({PAYLOAD_TYPES[type_id].name}).")
+    if (decoder is None) == (saver is None):
+        raise ValueError("A payload type needs either a decoder or a saver.")
+    if saver is not None and output_name is None:
+        raise ValueError("A payload type with a saver needs an output file name.")
+
+    codec = payload_codec(type_id, name, encoder, decoder, saver, output_name, metadata)
+    PAYLOAD_TYPES[type_id] = codec
+    return codec
+
+def iter_section(type_id: int, value):
+    """
+    Lazy encoding of one section with the registered encoder of 'type_id'\n
+    Nothing is encoded before the first item is requested.
+    """
+    codec = PAYLOAD_TYPES[type_id]
+    meta, nbits, pieces = codec.encoder(value)
+    if codec.metadata:
+        block = encode_metadata(meta)
+        nbits += len(block)
+        pieces = itertools.chain([block], pieces)
+    yield from iter_chunk(type_id, nbits, pieces)
+
+def _whole(bits: bit_buffer) -> tuple[None, int, list]:
+    """Encoder result for a payload produced in one piece, without metadata."""
+    return None, len(bits), [bits]
+
+def _encode_file(path: str) -> tuple[None, int, object]:
+    """Encoder result for a file streamed from disk in blocks."""
+    return None, os.path.getsize(path) * 8, file_to_bit_chunks(path)
+
+def _encode_image(path: str, mode: str = 'L') -> tuple[dict, int, object]:
+    # Streamed band by band, the length comes from the image header
+    width, height, nbits = image_bitstring_length(path, mode)
+    return {"width": width, "height": height, "mode": mode}, nbits, iter_image_bands(path, mode)
+
+def _save_image(payload: bit_buffer, meta: dict, path: str) -> None:
+    img = bitstring_to_image(payload, meta["width"], meta["height"], mode=meta["mode"])
+    img.save(path)
+
+def _encode_csv(path: str) -> tuple[dict, int, object]:
+    # Columnar binary codec, the schema (header and column types) goes in the metadata block
+    return csv_to_columnar(path)
+
+def _save_csv(payload: bit_buffer, meta: dict, path: str) -> None:
+    create_csv(meta["header"], iter_columnar_rows(payload, meta), path)
+
+
+register_payload_type(0, "int",
+                      encoder=lambda n: _whole(int_to_binary(n)),
+                      decoder=lambda payload, meta: binary_str_to_int(payload))
+register_payload_type(1, "float",
+                      encoder=lambda f: _whole(float64_to_bin(f)),
+                      decoder=lambda payload, meta: bin_to_float32or64(payload))
+register_payload_type(2, "string",
+                      encoder=lambda s: _whole(str_to_bin(s)),
+                      decoder=lambda payload, meta: bin_to_str(payload))
+register_payload_type(3, "image",
+                      encoder=_encode_image,
+                      saver=_save_image,
+                      output_name="reconstructed_image.png",
+                      metadata=True)
+register_payload_type(4, "boolean",
+                      encoder=lambda b: _whole(bool_to_bitstring(b)),
+                      decoder=lambda payload, meta: bitstring_to_bool(payload))
+register_payload_type(5, "telemetry bin data",
+                      encoder=lambda bits: _whole(as_bit_buffer(bits)),
+                      saver=lambda payload, meta, path: bitstring_to_binfile(payload, path),
+                      output_name="reconstructed_telemetry_log.bin")
+register_payload_type(6, "CSV file",
+                      encoder=_encode_csv,
+                      saver=_save_csv,
+                      output_name="reconstructed_house_keeping_csv_test_1.csv",
+                      metadata=True)
+register_payload_type(7, "txt report",
+                      encoder=_encode_file,
+                      saver=lambda payload, meta, path: bitstring_to_file(payload, path),
+                      output_name="reconstructed_text_report_1.txt")
+register_payload_type(8, "JSON file",
+                      encoder=_encode_file,
+                      saver=lambda payload, meta, path: bitstring_to_json_file(payload, path),
+                      output_name="reconstructed_house_keeping_json_test_1.json")
@@ -0,0 +1,63 @@
+import numpy as np
+
+from functions.QAM_modulation import *
+
+"""
+Round trips of clean (noise-free, perfectly timed) QAM basebands with the default demodulator
+settings: every bit must come back, for both pulse shapes, with the Python and the Cython
+implementations (when the qam_fast extension is built), and an empty bitstream must give an
+empty bitstream.
+"""
+
+try:
+    import qam_fast
+except ImportError:
+    qam_fast = None
+    print("qam_fast is not built, only the Python implementation is checked\n")
+
+rng = np.random.default_rng(0)
+bits = rng.integers(0, 2, 32000).astype(np.uint8)
+
+# (pulse, QAM order, timing_recovery): None is the demodulator default (Gardner loop for "rrc" only).
+# The loop acquisition costs a bit error or so on 256-QAM, which is checked with perfect timing.
+CASES = [("rect", M, None) for M in (4, 16, 64, 256)] \
+      + [("rrc", M, None) for M in (4, 16, 64)] + [("rrc", 256, False)]
+
+for pulse, M, timing_recovery in CASES:
+    for sps in (2, 4, 8):
+        baseband = QAM_mod_baseband(bit_buffer.from_bits(bits), M, sps, pulse=pulse)
+        decoded = QAM_demod_baseband(baseband, M, sps, timing_recovery, pulse=pulse).unpacked()[:len(bits)]
+        errors = int(np.count_nonzero(decoded != bits))
+        assert errors == 0, f"{pulse} {M}-QAM, {sps} samples/symbol: {errors} bit errors"
+
+        if qam_fast is not None:
+            baseband = qam_fast.qam_mod_baseband(bits, M, sps, pulse=pulse)
+            decoded = qam_fast.qam_demod_baseband(baseband, M, sps, timing_recovery, pulse=pulse)[:len(bits)]
+            errors = int(np.count_nonzero(decoded != bits))
+            assert errors == 0, f"qam_fast {pulse} {M}-QAM, {sps} samples/symbol: {errors} bit errors"
+
+    print(f"{pulse:4} {M:3}-QAM: clean round trips OK")
+
+empty = np.zeros(0, dtype=np.uint8)
+for pulse in ("rect", "rrc"):
+    assert len(QAM_demod_baseband(QAM_mod_baseband(bit_buffer(), 16, 8, pulse=pulse), 16, 8, pulse=pulse)) == 0
+    assert len(QAM_demod_baseband(np.zeros(0, dtype=np.complex64), 16, 8, pulse=pulse)) == 0
+    if qam_fast is not None:
+        assert len(qam_fast.qam_demod_baseband(qam_fast.qam_mod_baseband(empty, 16, 8, pulse=pulse),
+                                               16, 8, pulse=pulse)) == 0
+        assert len(qam_fast.qam_demod_baseband(np.zeros(0, dtype=np.complex64), 16, 8, pulse=pulse)) == 0
+    print(f"{pulse:4} empty bitstream OK")
+
+# Stream demodulation: the bits must not depend on where the recording is split
+# (uneven chunk sizes, empty chunks, chunks shorter than a symbol)
+fc, fs, sps = 200e3, 2e6, 20
+for n_bits in (8000, 400): # longer and shorter than the power estimate (power_symbols symbols)
+    rf_signal = QAM_mod(bit_buffer.from_bits(bits[:n_bits]), fc, fs, 16, sps)
+    whole = bit_buffer.join(QAM_demod_stream([rf_signal], fc, fs, 16, sps))
+
+    cuts = np.sort(rng.integers(0, len(rf_signal), 50))
+    cuts[:3] = [0, 1, 1]
+    chunks = np.split(rf_signal, cuts)
+    chunked = bit_buffer.join(QAM_demod_stream(chunks, fc, fs, 16, sps))
+    assert chunked == whole, f"{n_bits} bits: {np.count_nonzero(chunked.unpacked() != whole.unpacked())} bits differ"
+    print(f"stream {n_bits:5} bits in {len(chunks)} chunks: same bits as in one chunk OK")
@@ -43,30 +43,48 @@ print("Processing data ...\n")
 
 # If the message is modulated with QAM, the following commands can be used to demodulate it
 # received_bitstream = QAM_demod(rf_signal, fc)
-# received_bitstream = QAM_demod_baseband(rf_baseband)
-# received_bitstream = array_to_bitstring(qam_fast.qam_demod_baseband(rf_baseband, qam_order=16, samples_per_symbol=8))
+# received_bitstream = QAM_demod_baseband(rf_baseband, pulse="rrc") # pulse as given to the modulator
+# received_bitstream = array_to_bitstring(qam_fast.qam_demod_baseband(rf_baseband, qam_order=16, samples_per_symbol=8, pulse="rrc"))
 
-reception_source = 2 # 1 for a bistream straigth out of a .txt file
+reception_source = 2 # 1 for a bistream straigth out of the .bits file
                      # 2 for information in a .wav file (recorded by an SDR)
+                     # 3 for samples read straight from the CaribouLite (no SoapySDR, no intermediate file)
 
 if reception_source == 1:
-    with open("./info_to_send/bitstream.txt", "r", encoding="utf-8") as f:
-        received_bitstream =  f.read()
+    received_bitstream = read_bitstream_file("./info_to_send/bitstream.bits")
 
 else:
-    # Decoding the RLE_bin_data from the RF transmision
-    RLE_bin_data = ook_decoding("./reconstructed_data/recording.wav")
+    # Decoding the frames from the RF transmision: the CP heads are located by correlation,
+    # the CP head and tail are removed from each frame
+    if reception_source == 2:
+        frames = ook_decoding_frames("./reconstructed_data/recording.wav")
+    else:
+        import itertools
+        from functions.cariboulite_radio import radio_session
+
+        # The chunks are read by a background thread into a ring of preallocated slots,
+        # the decoder gets views on them (no copy); chunks are dropped (overruns) if it falls behind
+        with radio_session(tx_freq = 900e6) as radio:
+            radio.start_receiving(sample_rate = 4e6)
+            with radio.receive_stream(n_slots = 32) as stream:
+                chunks = (samples for samples, _ in itertools.islice(stream, 512))
+                frames = list(iter_ook_frames(chunks))
+            print(f"{stream.chunks} chunks received, {stream.overruns} overrun(s)")
+
+    if not frames:
+        raise RuntimeError("No frame found in the recording.")
+    print(f"{len(frames)} frame(s) found\n")
 
     # Loading the original RLE binaray data
-    original = bitstring_file_to_runs("./info_to_send/bitstream.txt")
+    original = bitstring_file_to_runs("./info_to_send/bitstream.bits")
 
     # Computing the symbol error rate (%) of the RF transmission
-    # avg = symmetric_ratio_average(original, RLE_bin_data[:-1])
+    # avg = symmetric_ratio_average(original[CP_HEAD_RUNS:-1], rle(frames[0].unpacked()))
     # print(f"SER: {(1-avg)*100} %")
 
-    received_bitstream = runs_to_bitstring(RLE_bin_data)[213:-30] # without the CP head and tail #TODO remove the tail !!!
+    received_bitstream = frames[0] # without the CP head and tail
 
-    print(received_bitstream)
+    print(received_bitstream.to_bitstring())
 
 
 """
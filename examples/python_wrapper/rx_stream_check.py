@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+
+from functions.cariboulite_radio import radio_session
+
+"""
+Checks of the rx_stream life cycle, runnable without a board against the stub library:
+
+    cd stub && gcc -shared -fPIC -I../../../software/libcariboulite/src -o libcariboulite.so cariboulite_stub.c && cd ..
+    gcc -shared -fPIC -I../../software/libcariboulite/src -o functions/libcariboulite_radio.so functions/main.c \
+        -Lstub -lcariboulite -lm -lpthread
+    LD_LIBRARY_PATH=stub python3 rx_stream_check.py
+
+- a stream that was never started raises instead of yielding an empty capture
+- stop() called from another thread ends the iteration cleanly (no TimeoutError), with the radio
+  delivering samples and with every read timing out
+"""
+
+TIMEOUT = 5.0 # s, much longer than the stop delay: a TimeoutError would show up as a slow failure
+
+
+def stop_later(stream, delay: float) -> threading.Thread:
+    thread = threading.Thread(target=lambda: (time.sleep(delay), stream.stop()))
+    thread.start()
+    return thread
+
+
+with radio_session() as radio:
+    radio.start_receiving()
+
+    # Never started
+    stream = radio.receive_stream(n_slots=4, timeout=TIMEOUT)
+    try:
+        next(iter(stream))
+    except RuntimeError as e:
+        print(f"not started: OK ({e})")
+    else:
+        raise AssertionError("A stream that was never started was iterated")
+
+    # Stopped from another thread, while chunks are coming in / while the consumer waits for one
+    for read_mode in ("", "empty"):
+        os.environ["CARIBOULITE_STUB_READ"] = read_mode
+        with radio.receive_stream(n_slots=4, timeout=TIMEOUT) as stream:
+            stopper = stop_later(stream, 0.2)
+            start = time.perf_counter()
+            n_chunks = sum(1 for _ in stream)
+            elapsed = time.perf_counter() - start
+            stopper.join()
+        assert elapsed < TIMEOUT / 2, f"the iteration took {elapsed:.2f} s"
+        assert (n_chunks > 0) == (read_mode == ""), f"{n_chunks} chunks"
+        print(f"stopped from another thread ({read_mode or 'samples'}): OK, {n_chunks} chunks in {elapsed:.2f} s")
+    os.environ.pop("CARIBOULITE_STUB_READ")
@@ -0,0 +1,88 @@
+// Stand-in for libcariboulite, to run the Python wrapper without a board (e.g. rx_stream_check.py)
+// Only the functions used by functions/main.c are provided. Build:
+//   gcc -shared -fPIC -I../../../software/libcariboulite/src -o libcariboulite.so cariboulite_stub.c
+//
+// The reads deliver a counter as I/Q samples, 1000 samples per read every 250 us.
+// Environment variables read at each call:
+//   CARIBOULITE_STUB_READ=fail    every read fails (returns -1)
+//   CARIBOULITE_STUB_READ=empty   every read times out (returns 0 after 1 ms)
+
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <cariboulite.h>
+
+#define STUB_READ_SAMPLES 1000
+
+static cariboulite_radio_state_st radio_state;
+static int initialized = 0; // like the real library, the board can only be opened once at a time
+static float tx_sample_rate = 4e6f;
+static long sample_counter = 0;
+
+bool cariboulite_detect_connected_board(cariboulite_version_en* hw_ver, char* name, char* uuid) { return true; }
+
+int cariboulite_init(bool force_fpga_prog, cariboulite_log_level_en log_lvl)
+{
+    if (initialized) return -1;
+    initialized = 1;
+    return 0;
+}
+
+void cariboulite_close(void) { initialized = 0; }
+
+cariboulite_radio_state_st* cariboulite_get_radio(cariboulite_channel_en ch) { return &radio_state; }
+
+int cariboulite_radio_set_frequency(cariboulite_radio_state_st* radio, bool break_before_make, double* freq) { return 0; }
+int cariboulite_radio_set_tx_power(cariboulite_radio_state_st* radio, int tx_power_dbm) { return 0; }
+int cariboulite_radio_set_tx_bandwidth_flt(cariboulite_radio_state_st* radio, float tx_bw) { return 0; }
+int cariboulite_radio_set_cw_outputs(cariboulite_radio_state_st* radio, bool lo_out, bool cw_out) { return 0; }
+int cariboulite_radio_activate_channel(cariboulite_radio_state_st* radio, cariboulite_channel_dir_en dir, bool active) { return 0; }
+int cariboulite_radio_set_rx_sample_rate_flt(cariboulite_radio_state_st* radio, float sample_rate) { return 0; }
+int cariboulite_radio_set_rx_bandwidth_flt(cariboulite_radio_state_st* radio, float rx_bw) { return 0; }
+int cariboulite_radio_set_rx_gain_control(cariboulite_radio_state_st* radio, bool rx_agc_on, int rx_gain_value_db) { return 0; }
+
+int cariboulite_radio_set_tx_samp_cutoff_flt(cariboulite_radio_state_st* radio, float sample_rate)
+{
+    tx_sample_rate = sample_rate >= 3e6f ? 4e6f : 2e6f;
+    return 0;
+}
+
+int cariboulite_radio_get_tx_samp_cutoff_flt(cariboulite_radio_state_st* radio, float* sample_rate)
+{
+    *sample_rate = tx_sample_rate;
+    return 0;
+}
+
+int cariboulite_radio_get_rx_sample_rate_flt(cariboulite_radio_state_st* radio, float* sample_rate)
+{
+    *sample_rate = 4e6f;
+    return 0;
+}
+
+size_t cariboulite_radio_get_native_mtu_size_samples(cariboulite_radio_state_st* radio) { return STUB_READ_SAMPLES; }
+
+int cariboulite_radio_write_samples(cariboulite_radio_state_st* radio, cariboulite_sample_complex_int16* buffer, size_t length)
+{
+    usleep(1000);
+    return (int)length;
+}
+
+int cariboulite_radio_read_samples(cariboulite_radio_state_st* radio, cariboulite_sample_complex_int16* buffer,
+                                   cariboulite_sample_meta* metadata, size_t length)
+{
+    const char* mode = getenv("CARIBOULITE_STUB_READ");
+    if (mode && strcmp(mode, "fail") == 0) return -1;
+    if (mode && strcmp(mode, "empty") == 0) {
+        usleep(1000);
+        return 0;
+    }
+
+    size_t n = length > STUB_READ_SAMPLES ? STUB_READ_SAMPLES : length;
+    for (size_t i = 0; i < n; i++, sample_counter++) {
+        buffer[i].i = (int16_t)(sample_counter % 8000 - 4000);
+        buffer[i].q = (int16_t)(-(sample_counter % 7000));
+        if (metadata) metadata[i].sync = i == 0;
+    }
+    usleep(250);
+    return (int)n;
+}
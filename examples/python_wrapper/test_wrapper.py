@@ -11,3 +11,34 @@ transmit(
     tx_power = 0,
     filepath = "/home/sm1/bitstream.txt"
 )
+
+"""
+Same transmission with sample-accurate timing: the OOK envelope is streamed as IQ samples
+"""
+# from functions.cariboulite_radio import transmit_iq
+# transmit_iq(
+#     sample_rate = 4e6,
+#     tx_freq = 900e6,
+#     tx_bw = 1e6,
+#     tx_power = 0,
+#     filepath = "/home/sm1/bitstream.txt",
+#     bit_rate = 100e3
+# )
+
+"""
+Several frames in a row: the board is initialized once and only the changed settings are sent
+"""
+# from functions.cariboulite_radio import radio_session
+# with radio_session(sample_rate = 4e6, tx_freq = 900e6, tx_bw = 1e6, tx_power = 0) as radio:
+#     radio.transmit_iq("/home/sm1/bitstream.txt", bit_rate = 100e3)
+#     radio.transmit_iq("/home/sm1/bitstream.txt", bit_rate = 100e3, tx_freq = 905e6)
+
+"""
+Asynchronous transmission: the call returns right away, the progress can be followed and the transmission cancelled
+"""
+# with radio_session(sample_rate = 4e6, tx_freq = 900e6, tx_bw = 1e6, tx_power = 0) as radio:
+#     tx = radio.transmit_iq_async("/home/sm1/bitstream.bits", bit_rate = 100e3)
+#     while not tx.done():
+#         print(f"{tx.progress * 100:.1f} %")
+#         time.sleep(0.1)
+#     # or, in a coroutine: await radio.transmit_iq_async(...)
@@ -55,16 +55,14 @@ payload.text_report_path = "./info_to_send/text_report_1.txt"
 """
 Let's create the bitstream that the RF module will send
 """
-bitstream = payload.bistream()
+# The frame is encoded lazily and written section by section in the packed bitstream format,
+# so the whole bitstream is never held in memory
+n_bits = write_bitstream_file(payload.iter_frame(), "./info_to_send/bitstream.bits")
 
-print(f"The payload has a length of {len(bitstream)} bits")
-
-# Save the bitstream in a .txt file
-with open("./info_to_send/bitstream.txt", "w") as f:
-    f.write(bitstream)
+print(f"The payload has a length of {n_bits} bits")
 
 """
-The .txt is then shared to the C api to send the bin data with the cariboulite 
+The packed .bits file is then shared to the C api to send the bin data with the cariboulite 
 """
 print("\n----------------")
 print("  Transmission")
@@ -75,7 +73,7 @@ transmit(
     tx_freq = 900e6,
     tx_bw = 1e6,
     tx_power = 0,
-    filepath = "./info_to_send/bitstream.txt"
+    filepath = "./info_to_send/bitstream.bits"
 )
 
 print("Done!\n")
@@ -85,6 +83,6 @@ print("Done!\n")
 # """
 # Let's modulate the bitstream via QAM
 # """
-# rf_baseband = qam_fast.qam_mod_baseband(bitstring_to_array(bitstream), qam_order=16, samples_per_symbol=8)
+# rf_baseband = qam_fast.qam_mod_baseband(bitstring_to_array(bitstream), qam_order=16, samples_per_symbol=8, pulse="rrc")
 # rf_baseband.tofile("rf_baseband2.bin")
 